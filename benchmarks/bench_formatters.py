@@ -0,0 +1,142 @@
+# python
+#
+# etr_print_modified_values - Formatter micro-benchmark
+#
+# Per-property cost of the typed reader dispatch (formatters.py) against the previous approach: serialize every
+# value with SDValueSerializer.sToString, then clean the string with substring checks, splits and regexes.
+# 'read' is the cost for values equal to the Reference (never formatted), 'typed' reads and formats.
+# Runs without Designer, with minimal stand-ins for the SDValue classes:
+#
+#   python benchmarks/bench_formatters.py
+
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etr_print_modified_values.formatters import formatValue, readValue
+from etr_print_modified_values.report import roundFloat
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Minimal stand-ins, only what the formatters and the old cleaner use
+
+class Vector(object):
+    def __init__(self, *values):
+        for name, v in zip('xyzw', values):
+            setattr(self, name, v)
+
+class Enumerator(object):
+    def __init__(self, index, identifier):
+        self.__index = index
+        self.__identifier = identifier
+    def getDefaultValue(self):
+        return Value('SDValueInt', self.__index)
+    def getId(self):
+        return self.__identifier
+
+class EnumType(object):
+    def __init__(self, identifier, names):
+        self.__identifier = identifier
+        self.__enumerators = [Enumerator(i, name) for i, name in enumerate(names)]
+    def getId(self):
+        return self.__identifier
+    def getEnumerators(self):
+        return self.__enumerators
+
+class Value(object):
+    def __init__(self, className, native, valueType=None):
+        self.__className = className
+        self.__native = native
+        self.__type = valueType
+    def getClassName(self):
+        return self.__className
+    def getType(self):
+        return self.__type
+    def get(self):
+        return self.__native
+
+blendModes = EnumType('sbs::compositing::blendingmode', ['copy', 'add', 'subtract', 'multiply', 'add_sub', 'max'])
+
+def serialize(value):
+    className = value.getClassName()
+    v = value.get()
+    if className == 'SDValueEnum':
+        return 'SDValueEnum(+"%s"+,%d)' % (value.getType().getId(), v)
+    if className == 'SDValueFloat':
+        return 'SDValueFloat(float(%r))' % v
+    if className == 'SDValueFloat2':
+        return 'SDValueFloat2(float2(%r,%r))' % (v.x, v.y)
+    if className == 'SDValueFloat4':
+        return 'SDValueFloat4(float4(%r,%r,%r,%r))' % (v.x, v.y, v.z, v.w)
+    if className == 'SDValueInt':
+        return 'SDValueInt(int(%d))' % v
+    if className == 'SDValueBool':
+        return 'SDValueBool(bool(%s))' % ('true' if v else 'false')
+    return 'SDValueString(string(%s))' % v
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Previous per-property path, kept here only as the baseline
+
+def legacyFormat(value):
+    valueType = value.getType()
+    valueClass = value.getClassName()
+    value = serialize(value)
+
+    if valueClass == 'SDValueEnum':
+        value = value.replace('"', '+' )
+        value = re.sub(r'\+.*?\+', '', value)
+        value = re.sub(r'\D', '', value)
+        value = int(value)
+        enum_dict = {}
+        for enum in valueType.getEnumerators():
+            enum_dict[enum.getDefaultValue().get()] = enum.getId()
+        value = enum_dict[value].title()
+    elif 'SDValueInt(int(' in value:
+        value = value.replace('SDValueInt(int(','').replace('))','')
+    elif 'SDValueFloat(float(' in value:
+        value = value.replace('SDValueFloat(float(','').replace('))','')
+        value = roundFloat(value)
+    elif 'SDValueFloat2(float2(' in value:
+        value = value.replace('SDValueFloat2(float2(','').replace('))','')
+        value = roundFloat(value.split(',')[0]), roundFloat(value.split(',')[1])
+    elif 'SDValueFloat4(float4(' in value:
+        value = value.replace('SDValueFloat4(float4(','').replace('))','')
+        value = tuple(roundFloat(value.split(',')[i]) for i in range(4))
+    elif 'SDValueBool(bool(' in value:
+        value = value.replace('SDValueBool(bool(','').replace('))','')
+    elif 'SDValueString(string(' in value:
+        value = value.replace('SDValueString(string(','').replace('))','')
+    return value
+
+
+# --------------------------------------------------------------------------------------------------------------------
+
+values = {
+    'Enum' : Value('SDValueEnum', 3, blendModes),
+    'Float' : Value('SDValueFloat', 0.173654),
+    'Float2' : Value('SDValueFloat2', Vector(0.17365, 0.3249)),
+    'Float4' : Value('SDValueFloat4', Vector(0.1, 0.2, 0.3, 1.0)),
+    'Int' : Value('SDValueInt', 42),
+    'Bool' : Value('SDValueBool', True),
+    'String' : Value('SDValueString', 'Image Input')
+}
+
+def main(number=20000):
+    print(f'{"class":<8} {"legacy us":>10} {"typed us":>10} {"speedup":>8} {"read us":>10}')
+
+    for name, value in values.items():
+        assert formatValue(value) == legacyFormat(value), name
+
+        legacy = min(timeit.repeat(lambda: legacyFormat(value), number=number, repeat=3)) / number * 1e6
+        typed = min(timeit.repeat(lambda: formatValue(value), number=number, repeat=3)) / number * 1e6
+        read = min(timeit.repeat(lambda: readValue(value), number=number, repeat=3)) / number * 1e6
+        print(f'{name:<8} {legacy:>10.2f} {typed:>10.2f} {legacy / typed:>7.1f}x {read:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
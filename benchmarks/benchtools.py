@@ -0,0 +1,47 @@
+# python
+#
+# etr_print_modified_values - Benchmark helpers
+#
+# What the benchmarks share besides fixtures (see conftest.py): resetting the plugin to a fresh session and running
+# a benchmark while keeping its per stage timings. Tests import them from here, never from conftest.
+
+
+import os
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+stageResults = [] # (test id, rounds, min seconds, mean seconds, stages), printed at the end by conftest.py
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Plugin state back to a fresh Designer session: no cache (memory or disk), no pool, no comments
+
+def resetPluginState():
+    from etr_print_modified_values import formatters, modvalues, refcache, refpool
+
+    refpool.shutdownReferencePool()
+    refcache._referenceCache = None
+    try:
+        os.remove(os.path.join(refcache.getDefaultCacheDir(), refcache.CACHE_FILE_NAME))
+    except OSError:
+        pass
+
+    modvalues._atomicDefinitions = None
+    modvalues.ownedComments.clear()
+    formatters._enumTables.clear()
+    formatters._structMembers.clear()
+
+
+# Run 'target' through the benchmark fixture and keep the per stage timings of one round
+def runBenchmark(benchmark, stages, target, setup=None, rounds=3):
+    stages.reset()
+    benchmark.pedantic(target, setup=setup, rounds=rounds)
+
+    stageSnapshot = stages.snapshot(rounds)
+    benchmark.extra_info['stages'] = stageSnapshot
+
+    times = getattr(benchmark, 'times', None)
+    if times is None: # pytest-benchmark keeps its own statistics
+        stats = benchmark.stats.stats
+        times = [stats.min, stats.mean]
+    stageResults.append((benchmark.name, rounds, min(times), sum(times) / len(times), stageSnapshot))
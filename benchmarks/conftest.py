@@ -0,0 +1,147 @@
+# python
+#
+# etr_print_modified_values - Benchmark fixtures
+#
+# Runs the plugin on top of the fake 'sd' and 'PySide2' packages of 'fakesd/', so it can be measured on plain Linux:
+#
+#   python -m pytest benchmarks -q
+#
+# With pytest-benchmark installed its 'benchmark' fixture is used (and --benchmark-json etc. work as usual),
+# otherwise a small fixture with the same call style takes its place. Either way, per stage timings (fake API calls
+# and plugin stages, per round) are printed at the end and stored in 'benchmark.extra_info'.
+
+
+import os
+import sys
+import time
+import tempfile
+
+from collections import defaultdict
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BENCHMARKS_DIR, 'fakesd'), os.path.dirname(BENCHMARKS_DIR)]
+
+# Never touch the user's real reference cache
+os.environ['ETR_PMV_CACHE_DIR'] = tempfile.mkdtemp(prefix='etr_pmv_bench_')
+
+import pytest
+import fakeworld
+
+from benchtools import stageResults, resetPluginState
+
+from PySide2 import QtGui
+
+QtGui.QGuiApplication.instance() # Designer's application, before anything asks for it
+
+try:
+    import pytest_benchmark
+except ImportError:
+    pytest_benchmark = None
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Fallback 'benchmark' fixture, only what the suite uses: benchmark(fn, ...), benchmark.pedantic(...), extra_info
+
+if pytest_benchmark is None:
+
+    class Benchmark(object):
+
+        def __init__(self, name):
+            self.name = name
+            self.extra_info = {}
+            self.times = []
+
+        def __call__(self, function, *args, **kwargs):
+            return self.pedantic(function, args, kwargs, rounds=5)
+
+        def pedantic(self, target, args=(), kwargs=None, setup=None, rounds=1, warmup_rounds=0, iterations=1):
+            result = None
+            for index in range(warmup_rounds + rounds):
+                if setup is not None:
+                    setup()
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    result = target(*args, **(kwargs or {}))
+                if index >= warmup_rounds:
+                    self.times.append((time.perf_counter() - start) / iterations)
+            return result
+
+    @pytest.fixture
+    def benchmark(request):
+        return Benchmark(request.node.nodeid)
+
+
+@pytest.fixture
+def world(tmp_path):
+    fakeworld.config.update(definitionDefaults=True, version='14.0.0')
+    fakeworld.install(fakeworld.World(str(tmp_path)))
+    resetPluginState()
+    yield fakeworld.currentWorld()
+    resetPluginState()
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Plugin stages, timed by wrapping their module functions (inclusive times, nested stages are counted in both)
+
+pluginStages = [
+    ('modvalues', 'getReferenceValues'),
+    ('modvalues', 'getNodePropValues'),
+    ('modvalues', 'getDifferentValues'),
+    ('modvalues', 'writeComment'),
+]
+
+class StageTimer(object):
+
+    def __init__(self, monkeypatch):
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+        import importlib
+        for moduleName, functionName in pluginStages:
+            module = importlib.import_module('etr_print_modified_values.' + moduleName)
+            monkeypatch.setattr(module, functionName, self.__wrap(functionName, getattr(module, functionName)))
+
+    def __wrap(self, stage, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.calls[stage] += 1
+                self.seconds[stage] += time.perf_counter() - start
+        return timed
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+        fakeworld.stats.reset()
+
+    # Stages per round: plugin stages first, then the fake API calls
+    def snapshot(self, rounds):
+        stages = {}
+        for stage, calls in self.calls.items():
+            stages['plugin.' + stage] = {'calls': calls / rounds, 'seconds': self.seconds[stage] / rounds}
+        for stage, values in fakeworld.stats.snapshot().items():
+            stages['sd.' + stage] = {'calls': values['calls'] / rounds, 'seconds': values['seconds'] / rounds}
+        return stages
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    return StageTimer(monkeypatch)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not stageResults:
+        return
+
+    write = terminalreporter.write_line
+    write('')
+    write('Per stage timings (per round, ms)')
+
+    for name, rounds, minimum, mean, stageSnapshot in stageResults:
+        write('')
+        write(f'{name.split("::")[-1]}  rounds {rounds}  min {minimum * 1e3:.2f}  mean {mean * 1e3:.2f}')
+        for stage, values in stageSnapshot.items():
+            seconds = f'{values["seconds"] * 1e3:>10.2f}' if values['seconds'] else f'{"":>10}'
+            write(f'    {stage:<32} {values["calls"]:>10.1f} calls {seconds}')
@@ -0,0 +1,150 @@
+from collections import deque
+
+
+_pending = deque()
+
+# Run the callbacks scheduled so far (not the ones they schedule themselves). False once nothing is left
+def processEvents():
+    for _ in range(len(_pending)):
+        _pending.popleft()()
+    return bool(_pending)
+
+
+class Qt(object):
+    transparent = 0
+    WindowModal = 1
+
+
+class _BoundSignal(object):
+
+    def __init__(self):
+        self.__slots = []
+
+    def connect(self, slot):
+        self.__slots.append(slot)
+
+    def disconnect(self, slot=None):
+        self.__slots = [] if slot is None else [s for s in self.__slots if s != slot]
+
+    def emit(self, *args):
+        for slot in list(self.__slots):
+            slot(*args)
+
+class Signal(object):
+
+    def __init__(self, *types):
+        self.__name = None
+
+    def __set_name__(self, owner, name):
+        self.__name = '_signal_' + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        signal = instance.__dict__.get(self.__name)
+        if signal is None:
+            signal = instance.__dict__[self.__name] = _BoundSignal()
+        return signal
+
+
+class QObject(object):
+    destroyed = Signal()
+
+    def __init__(self, parent=None):
+        self.__parent = parent
+
+    def parent(self):
+        return self.__parent
+
+    def tr(self, text):
+        return text
+
+    def deleteLater(self):
+        self.destroyed.emit()
+
+
+class QEvent(object):
+    MouseButtonPress = 2
+    MouseButtonDblClick = 4
+    KeyPress = 6
+    Wheel = 31
+
+    def __init__(self, eventType):
+        self.__type = eventType
+
+    def type(self):
+        return self.__type
+
+
+class QCoreApplication(QObject):
+    _instance = None
+
+    def __init__(self):
+        super(QCoreApplication, self).__init__()
+        self.__filters = []
+
+    # One application per process, of the class asking first (QtGui.QGuiApplication in the benchmarks)
+    @classmethod
+    def instance(cls):
+        if QCoreApplication._instance is None:
+            QCoreApplication._instance = cls()
+        return QCoreApplication._instance
+
+    def installEventFilter(self, obj):
+        self.__filters.append(obj)
+
+    def removeEventFilter(self, obj):
+        self.__filters = [f for f in self.__filters if f is not obj]
+
+    # User input, as seen by the filters installed on the application
+    @classmethod
+    def sendEvent(cls, receiver, event):
+        for obj in list(cls.instance().__filters):
+            if obj.eventFilter(receiver, event):
+                return True
+        return False
+
+
+class QSize(object):
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+
+class QTimer(QObject):
+    timeout = Signal()
+
+    def __init__(self, parent=None):
+        super(QTimer, self).__init__(parent)
+        self.__active = False
+        self.__singleShot = False
+        self.__interval = 0
+
+    @staticmethod
+    def singleShot(msec, callback):
+        _pending.append(callback)
+
+    def setSingleShot(self, singleShot):
+        self.__singleShot = singleShot
+
+    def setInterval(self, msec):
+        self.__interval = msec
+
+    def interval(self):
+        return self.__interval
+
+    def start(self, msec=None):
+        self.__active = True
+
+    def stop(self):
+        self.__active = False
+
+    def isActive(self):
+        return self.__active
+
+    # Fire by hand, like the event loop would once the interval is over
+    def fire(self):
+        if self.__singleShot:
+            self.__active = False
+        self.timeout.emit()
@@ -0,0 +1,44 @@
+from .QtCore import QCoreApplication
+
+
+class QGuiApplication(QCoreApplication):
+    pixelRatio = 1.0
+
+    def devicePixelRatio(self):
+        return self.pixelRatio
+
+
+class QKeySequence(object):
+
+    def __init__(self, text):
+        self.text = text
+
+
+class QPixmap(object):
+
+    def __init__(self, size=None):
+        self.size = size
+
+    def isNull(self):
+        return False
+
+    def fill(self, color):
+        pass
+
+    def setDevicePixelRatio(self, ratio):
+        self.devicePixelRatio = ratio
+
+
+class QPainter(object):
+
+    def __init__(self, device=None):
+        self.device = device
+
+    def end(self):
+        pass
+
+
+class QIcon(object):
+
+    def __init__(self, pixmap=None):
+        self.pixmap = pixmap
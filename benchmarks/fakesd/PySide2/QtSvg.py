@@ -0,0 +1,10 @@
+class QSvgRenderer(object):
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+
+    def isValid(self):
+        return True
+
+    def render(self, painter):
+        pass
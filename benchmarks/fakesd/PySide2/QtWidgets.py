@@ -0,0 +1,79 @@
+from .QtCore import QObject, Signal
+
+
+class QAction(QObject):
+    triggered = Signal()
+    toggled = Signal(bool)
+
+    def __init__(self, icon=None, text='', parent=None):
+        super(QAction, self).__init__(parent)
+        self.icon = icon
+        self.text = text
+        self.__checkable = False
+        self.__checked = False
+
+    def setShortcut(self, shortcut):
+        self.shortcut = shortcut
+
+    def setToolTip(self, toolTip):
+        self.toolTip = toolTip
+
+    def setCheckable(self, checkable):
+        self.__checkable = checkable
+
+    def isChecked(self):
+        return self.__checked
+
+    def trigger(self):
+        if self.__checkable:
+            self.__checked = not self.__checked
+            self.toggled.emit(self.__checked)
+        self.triggered.emit()
+
+
+class QWidget(QObject):
+
+    def setObjectName(self, name):
+        self.objectName = name
+
+    def setWindowTitle(self, title):
+        self.windowTitle = title
+
+    def setWindowModality(self, modality):
+        pass
+
+
+class QToolBar(QWidget):
+
+    def __init__(self, parent=None):
+        super(QToolBar, self).__init__(parent)
+        self.actions = []
+
+    def addAction(self, icon, text):
+        action = QAction(icon, text, self)
+        self.actions.append(action)
+        return action
+
+
+class QProgressDialog(QWidget):
+    canceled = Signal()
+
+    def __init__(self, labelText='', cancelButtonText='', minimum=0, maximum=100, parent=None):
+        super(QProgressDialog, self).__init__(parent)
+        self.__maximum = maximum
+        self.__value = minimum
+
+    def setMinimumDuration(self, msec):
+        pass
+
+    def setMaximum(self, maximum):
+        self.__maximum = maximum
+
+    def setValue(self, value):
+        self.__value = value
+
+    def value(self):
+        return self.__value
+
+    def reset(self):
+        self.__value = 0
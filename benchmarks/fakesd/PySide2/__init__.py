@@ -0,0 +1,4 @@
+# python
+#
+# Fake 'PySide2' for the benchmarks: the few Qt classes the plugin touches, no real widgets. Timers never fire on
+# their own, QtCore.processEvents() runs what QTimer.singleShot scheduled, so event loop driven code can be benchmarked
@@ -0,0 +1,700 @@
+# python
+#
+# etr_print_modified_values - Fake 'sd' API world for the benchmarks
+#
+# Just the parts of the Designer Python API the plugin uses, in plain Python: context, application, UI/package/module
+# managers, graphs, nodes, definitions, properties, SDValue classes, the serializer and Comments. The 'sd' and
+# 'PySide2' packages next to this file only re-export what is here.
+#
+# Package loading and node creation are the expensive calls inside Designer, so they sleep for a configurable time:
+#
+#   FAKESD_PACKAGE_LOAD_LATENCY  seconds per loadUserPackage (default 0.02)
+#   FAKESD_NODE_CREATE_LATENCY   seconds per newNode/newInstanceNode (default 0.002)
+#
+# Every API call is also counted (and timed when it matters) per stage in 'stats', to report where time goes.
+
+
+import os
+import time
+
+from collections import OrderedDict, defaultdict
+
+
+PACKAGE_LOAD_LATENCY = float(os.environ.get('FAKESD_PACKAGE_LOAD_LATENCY', '0.02'))
+NODE_CREATE_LATENCY = float(os.environ.get('FAKESD_NODE_CREATE_LATENCY', '0.002'))
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Per stage call counts and cumulated seconds
+
+class Stats(object):
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def reset(self):
+        self.calls.clear()
+        self.seconds.clear()
+
+    def count(self, stage):
+        self.calls[stage] += 1
+
+    def wait(self, stage, latency):
+        start = time.perf_counter()
+        if latency > 0:
+            time.sleep(latency)
+        self.calls[stage] += 1
+        self.seconds[stage] += time.perf_counter() - start
+
+    def snapshot(self):
+        return dict((stage, {'calls': calls, 'seconds': round(self.seconds.get(stage, 0.0), 6)})
+                    for stage, calls in sorted(self.calls.items()))
+
+stats = Stats()
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# sd.api.sdbasetypes
+
+class _Vector(object):
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ','.join(repr(getattr(self, n)) for n in self.__slots__))
+
+class float2(_Vector):
+    __slots__ = ('x', 'y')
+
+class float3(_Vector):
+    __slots__ = ('x', 'y', 'z')
+
+class float4(_Vector):
+    __slots__ = ('x', 'y', 'z', 'w')
+
+class int2(_Vector):
+    __slots__ = ('x', 'y')
+
+class ColorRGBA(_Vector):
+    __slots__ = ('r', 'g', 'b', 'a')
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Arrays as returned by the API (getSize/getItem)
+
+class SDArray(list):
+
+    def getSize(self):
+        return len(self)
+
+    def getItem(self, index):
+        return self[index]
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# sd.api.sdproperty
+
+class SDPropertyCategory(object):
+    Annotation = 'Annotation'
+    Input = 'Input'
+    Output = 'Output'
+
+class SDProperty(object):
+
+    def __init__(self, identifier, label, category, default, connectable=False):
+        self.__identifier = identifier
+        self.__label = label
+        self.__category = category
+        self.__connectable = connectable
+        self.default = default
+
+    def getId(self):
+        return self.__identifier
+
+    def getLabel(self):
+        return self.__label
+
+    def getCategory(self):
+        return self.__category
+
+    def isConnectable(self):
+        return self.__connectable
+
+    # Like some definitions inside Designer, defaults can be made unavailable to force Reference nodes
+    def getDefaultValue(self):
+        stats.count('getDefaultValue')
+        return self.default if config['definitionDefaults'] else None
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# SDValue classes and types
+
+class SDType(object):
+
+    def __init__(self, identifier):
+        self.__identifier = identifier
+
+    def getId(self):
+        return self.__identifier
+
+class SDTypeEnum(SDType):
+
+    def __init__(self, identifier, names):
+        super(SDTypeEnum, self).__init__(identifier)
+        self.__enumerators = SDArray(SDEnumerator(i, name) for i, name in enumerate(names))
+
+    def getEnumerators(self):
+        return self.__enumerators
+
+class SDEnumerator(object):
+
+    def __init__(self, index, identifier):
+        self.__value = SDValue('SDValueInt', index)
+        self.__identifier = identifier
+
+    def getId(self):
+        return self.__identifier
+
+    def getDefaultValue(self):
+        return self.__value
+
+class SDTypeStruct(SDType):
+
+    def __init__(self, identifier, members):
+        super(SDTypeStruct, self).__init__(identifier)
+        self.__members = SDArray(SDProperty(name, name, None, None) for name in members)
+
+    def getMembers(self):
+        return self.__members
+
+class SDValue(object):
+    __slots__ = ('className', 'native', 'valueType')
+
+    def __init__(self, className, native, valueType=None):
+        self.className = className
+        self.native = native
+        self.valueType = valueType
+
+    def getClassName(self):
+        return self.className
+
+    def getType(self):
+        return self.valueType
+
+    def get(self):
+        return self.native
+
+class SDValueArray(SDValue):
+    __slots__ = ()
+
+    def __init__(self, items):
+        super(SDValueArray, self).__init__('SDValueArray', SDArray(items))
+
+    def getSize(self):
+        return len(self.native)
+
+    def getItem(self, index):
+        return self.native[index]
+
+class SDValueStruct(SDValue):
+    __slots__ = ()
+
+    def __init__(self, structType, members):
+        super(SDValueStruct, self).__init__('SDValueStruct', dict(members), structType)
+
+    def getPropertyValue(self, member):
+        return self.native[member.getId()]
+
+class SDTexture(object):
+
+    def __init__(self, bytesPerPixel):
+        self.__bytesPerPixel = bytesPerPixel
+
+    def getBytesPerPixel(self):
+        return self.__bytesPerPixel
+
+
+# sd.api.sdvalueserializer
+class SDValueSerializer(object):
+
+    @staticmethod
+    def sToString(value):
+        stats.count('sToString')
+        return '%s(%r)' % (value.getClassName(), value.get())
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Definitions, nodes and graphs
+
+class SDDefinition(object):
+
+    def __init__(self, identifier, label, properties):
+        self.__identifier = identifier
+        self.__label = label
+        self.__properties = properties # Category: SDArray of SDProperty
+
+    def getId(self):
+        return self.__identifier
+
+    def getLabel(self):
+        return self.__label
+
+    def getProperties(self, category):
+        return self.__properties.get(category, SDArray())
+
+class SDConnection(object):
+
+    def __init__(self, node, prop):
+        self.__node = node
+        self.__prop = prop
+
+    def getInputPropertyNode(self):
+        return self.__node
+
+    def getInputProperty(self):
+        return self.__prop
+
+class SDNode(object):
+
+    def __init__(self, identifier, definition, values, resource=None, position=None):
+        self.__identifier = identifier
+        self.__definition = definition
+        self.__values = values # Property id: SDValue
+        self.__resource = resource
+        self.__position = position or float2(0.0, 0.0)
+        self.__connections = {} # Property id: SDArray of SDConnection
+        self.comments = []
+
+    def getIdentifier(self):
+        return self.__identifier
+
+    def getDefinition(self):
+        return self.__definition
+
+    def getReferencedResource(self):
+        return self.__resource
+
+    def getPosition(self):
+        return self.__position
+
+    def getProperties(self, category):
+        stats.count('getProperties')
+        return self.__definition.getProperties(category)
+
+    def getPropertyValue(self, prop):
+        stats.count('getPropertyValue')
+        return self.__values.get(prop.getId())
+
+    def setPropertyValue(self, prop, value):
+        self.__values[prop.getId()] = value
+
+    def getPropertyConnections(self, prop):
+        return self.__connections.get(prop.getId(), SDArray())
+
+    def connect(self, prop, upstreamNode, upstreamProp):
+        self.__connections.setdefault(prop.getId(), SDArray()).append(SDConnection(upstreamNode, upstreamProp))
+
+class SDSBSCompGraph(object):
+
+    def __init__(self, package=None, identifier='graph'):
+        self.__package = package
+        self.__identifier = identifier
+        self.__nodes = OrderedDict()
+        self.__nextId = 1
+        self.graphObjects = [] # Free Comments, child Comments are kept by their node
+
+    @classmethod
+    def sNew(cls, package):
+        stats.count('graphNew')
+        return cls(package)
+
+    def getIdentifier(self):
+        return self.__identifier
+
+    def setIdentifier(self, identifier):
+        self.__identifier = identifier
+
+    def getPackage(self):
+        return self.__package
+
+    def getNodes(self):
+        stats.count('getNodes')
+        return SDArray(self.__nodes.values())
+
+    def getGraphObjects(self):
+        stats.count('getGraphObjects')
+        return SDArray(self.graphObjects + [c for node in self.__nodes.values() for c in node.comments])
+
+    def addNode(self, definition, values, resource=None, position=None):
+        node = SDNode(str(self.__nextId), definition, values, resource, position)
+        self.__nextId += 1
+        self.__nodes[node.getIdentifier()] = node
+        return node
+
+    # New nodes get the default values of their definition, the same way Designer does
+    def newNode(self, definitionId):
+        stats.wait('newNode', NODE_CREATE_LATENCY)
+        definition = currentWorld().atomicDefinitions.get(definitionId)
+        if definition is None:
+            return None
+        return self.addNode(definition, defaultValues(definition))
+
+    def newInstanceNode(self, resource):
+        stats.wait('newInstanceNode', NODE_CREATE_LATENCY)
+        definition = resource.getDefinition()
+        return self.addNode(definition, defaultValues(definition), resource)
+
+    def deleteNode(self, node):
+        stats.count('deleteNode')
+        self.__nodes.pop(node.getIdentifier(), None)
+
+def defaultValues(definition):
+    values = {}
+    for category in (SDPropertyCategory.Annotation, SDPropertyCategory.Input):
+        for prop in definition.getProperties(category):
+            values[prop.getId()] = prop.default # Whatever 'definitionDefaults' says
+    return values
+
+
+# sd.api.sdgraphobjectcomment
+class SDGraphObjectComment(object):
+
+    def __init__(self, node):
+        self.__node = node
+        self.__position = None
+        self.__description = ''
+
+    @classmethod
+    def sNewAsChild(cls, node):
+        stats.count('commentNew')
+        comment = cls(node)
+        node.comments.append(comment)
+        return comment
+
+    @classmethod
+    def sNew(cls, graph):
+        stats.count('commentNew')
+        comment = cls(None)
+        graph.graphObjects.append(comment)
+        return comment
+
+    # Child Comments are positioned relative to this node
+    def getParent(self):
+        return self.__node
+
+    def setPosition(self, position):
+        self.__position = position
+
+    def getPosition(self):
+        return self.__position
+
+    def setDescription(self, description):
+        stats.count('commentSetDescription')
+        self.__description = description
+
+    def getDescription(self):
+        return self.__description
+
+
+# sd.api.sdhistoryutils
+class SDHistoryUtils(object):
+
+    class UndoGroup(object):
+
+        def __init__(self, name):
+            self.name = name
+
+        def __enter__(self):
+            stats.count('undoGroup')
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+
+# sd.ui.graphgrid
+class GraphGrid(object):
+
+    @staticmethod
+    def sGetFirstLevelSize():
+        return 16.0
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Packages, modules and application
+
+class SDResource(object):
+
+    def __init__(self, package, identifier, definition):
+        self.__package = package
+        self.__identifier = identifier
+        self.__definition = definition
+
+    def getPackage(self):
+        return self.__package
+
+    def getIdentifier(self):
+        return self.__identifier
+
+    def getDefinition(self):
+        return self.__definition
+
+class SDPackage(object):
+
+    def __init__(self, filePath=None):
+        self.__filePath = filePath
+        self.resources = OrderedDict()
+
+    def getFilePath(self):
+        return self.__filePath
+
+    def findResourceFromUrl(self, url):
+        return self.resources.get(url)
+
+class SDPackageMgr(object):
+
+    def __init__(self, world):
+        self.__world = world
+        self.loaded = []
+
+    def loadUserPackage(self, filePath):
+        stats.wait('loadUserPackage', PACKAGE_LOAD_LATENCY)
+        package = self.__world.packages[filePath]
+        self.loaded.append(package)
+        return package
+
+    def unloadUserPackage(self, package):
+        stats.count('unloadUserPackage')
+        if package in self.loaded:
+            self.loaded.remove(package)
+
+    def newUserPackage(self):
+        stats.count('newUserPackage')
+        return SDPackage()
+
+    def getUserPackages(self):
+        return SDArray(self.loaded)
+
+    # Library packages are never open by the user in these benchmarks
+    def getUserPackageFromFilePath(self, filePath):
+        return None
+
+class SDModule(object):
+
+    def __init__(self, definitions):
+        self.__definitions = definitions
+
+    def getDefinitions(self):
+        return SDArray(self.__definitions.values())
+
+class SDModuleMgr(object):
+
+    def __init__(self, world):
+        self.__world = world
+
+    def getModuleFromId(self, moduleId):
+        if moduleId == 'sbs::compositing':
+            return SDModule(self.__world.atomicDefinitions)
+        return None
+
+class QtForPythonUIMgr(object):
+
+    def __init__(self):
+        self.currentGraph = None
+        self.selection = SDArray()
+        self.callbacks = {}
+
+    def getCurrentGraph(self):
+        return self.currentGraph
+
+    def getCurrentGraphSelectedNodes(self):
+        return SDArray(self.selection)
+
+    def getMainWindow(self):
+        return None
+
+    def registerGraphViewCreatedCallback(self, callback):
+        callbackId = len(self.callbacks) + 1
+        self.callbacks[callbackId] = callback
+        return callbackId
+
+    def unregisterCallback(self, callbackId):
+        self.callbacks.pop(callbackId, None)
+
+    def addToolbarToGraphView(self, graphViewID, toolbar, icon=None, tooltip=None):
+        pass
+
+class SDApplication(object):
+
+    def __init__(self, world):
+        self.__uiMgr = QtForPythonUIMgr()
+        self.__packageMgr = SDPackageMgr(world)
+        self.__moduleMgr = SDModuleMgr(world)
+
+    def getQtForPythonUIMgr(self):
+        return self.__uiMgr
+
+    def getPackageMgr(self):
+        return self.__packageMgr
+
+    def getModuleMgr(self):
+        return self.__moduleMgr
+
+    def getVersion(self):
+        return config['version']
+
+class SDContext(object):
+
+    def __init__(self, world):
+        self.__app = SDApplication(world)
+
+    def getSDApplication(self):
+        return self.__app
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- SYNTHETIC CONTENT --------------------------------------------------------------------------------------
+#
+
+config = {'definitionDefaults': True, 'version': '14.0.0'}
+
+blendModes = SDTypeEnum('sbs::compositing::blendingmode', ['copy', 'add', 'subtract', 'multiply', 'add_sub', 'max'])
+gradientKey = SDTypeStruct('sbs::compositing::gradient_key', ['position', 'value'])
+
+# Property kinds, cycled so every node mixes all the SDValue classes the readers know
+def makeValue(kind, index, modified=False):
+    offset = 1.0 if modified else 0.0
+    base = (index % 10) * 0.1 + offset
+
+    if kind == 'float':
+        return SDValue('SDValueFloat', base)
+    if kind == 'float2':
+        return SDValue('SDValueFloat2', float2(base, base + 0.5))
+    if kind == 'float3':
+        return SDValue('SDValueFloat3', float3(base, base, base))
+    if kind == 'float4':
+        return SDValue('SDValueFloat4', float4(base, base, base, 1.0))
+    if kind == 'color':
+        return SDValue('SDValueColorRGBA', ColorRGBA(base, base, base, 1.0))
+    if kind == 'int':
+        return SDValue('SDValueInt', index + (7 if modified else 0))
+    if kind == 'int2':
+        return SDValue('SDValueInt2', int2(index, index + (7 if modified else 0)))
+    if kind == 'bool':
+        return SDValue('SDValueBool', modified)
+    if kind == 'enum':
+        return SDValue('SDValueEnum', 3 if modified else 0, blendModes)
+    if kind == 'string':
+        return SDValue('SDValueString', 'label %d%s' % (index, ' edited' if modified else ''))
+    if kind == 'gradient':
+        keys = [SDValueStruct(gradientKey, {'position': SDValue('SDValueFloat', k / 4.0),
+                                            'value': SDValue('SDValueColorRGBA', ColorRGBA(base, k / 4.0, 0.5, 1.0))})
+                for k in range(5)]
+        return SDValueArray(keys)
+    raise ValueError(kind)
+
+propertyKinds = ['float', 'float2', 'float4', 'int', 'bool', 'enum', 'string', 'color', 'int2', 'float3']
+
+
+def makeDefinition(identifier, label, propCount):
+    inputs = SDArray([SDProperty('input1', 'Input', SDPropertyCategory.Input, None, connectable=True)])
+    for index in range(propCount):
+        kind = 'gradient' if index % 25 == 24 else propertyKinds[index % len(propertyKinds)]
+        inputs.append(SDProperty('p%d_%s' % (index, kind), 'Param %d %s' % (index, kind.title()),
+                                 SDPropertyCategory.Input, makeValue(kind, index), connectable=False))
+
+    annotations = SDArray([SDProperty('description', 'Description', SDPropertyCategory.Annotation,
+                                      SDValue('SDValueString', ''))])
+
+    outputs = SDArray([SDProperty('unique_filter_output', 'Output', SDPropertyCategory.Output, None,
+                                  connectable=True)])
+
+    return SDDefinition(identifier, label, {SDPropertyCategory.Input: inputs,
+                                            SDPropertyCategory.Annotation: annotations,
+                                            SDPropertyCategory.Output: outputs})
+
+
+class World(object):
+
+    def __init__(self, rootDir):
+        self.rootDir = rootDir
+        self.atomicDefinitions = OrderedDict()
+        self.packages = OrderedDict() # File path: SDPackage
+        self.context = SDContext(self)
+
+    @property
+    def uiMgr(self):
+        return self.context.getSDApplication().getQtForPythonUIMgr()
+
+    # Atomic definitions use the labels of supported Atomic nodes, so the plugin treats them as such
+    def addAtomicDefinition(self, label, propCount):
+        identifier = 'sbs::compositing::%s_%d' % (label.lower().replace(' ', '_'), propCount)
+        definition = makeDefinition(identifier, label, propCount)
+        self.atomicDefinitions[identifier] = definition
+        return definition
+
+    # A library package with one graph, written to disk so the reference cache can validate it (mtime/size)
+    def addLibraryGraph(self, name, propCount):
+        filePath = os.path.join(self.rootDir, name + '.sbs')
+        with open(filePath, 'w') as f:
+            f.write('<package/>')
+
+        package = SDPackage(filePath)
+        definition = makeDefinition(name, name.replace('_', ' ').title(), propCount)
+        package.resources[name] = SDResource(package, name, definition)
+        self.packages[filePath] = package
+        return package.resources[name]
+
+    # A graph open by the user, its package can be closed with unloadUserPackage
+    def newGraph(self, identifier='benchmark_graph', filePath=None):
+        graph = SDSBSCompGraph(SDPackage(filePath), identifier)
+        self.context.getSDApplication().getPackageMgr().loaded.append(graph.getPackage())
+        self.uiMgr.currentGraph = graph
+        return graph
+
+    # A node modifying every 'modifiedEvery' property of its definition, its first input connected to 'upstream'
+    def addNode(self, graph, definitionOrResource, modifiedEvery=3, position=None, upstream=None):
+        if isinstance(definitionOrResource, SDResource):
+            resource, definition = definitionOrResource, definitionOrResource.getDefinition()
+        else:
+            resource, definition = None, definitionOrResource
+
+        values = defaultValues(definition)
+        for index, prop in enumerate(definition.getProperties(SDPropertyCategory.Input)):
+            if modifiedEvery and not prop.isConnectable() and index % modifiedEvery == 0:
+                values[prop.getId()] = makeValue(prop.getId().split('_', 1)[1], index, modified=True)
+
+        node = graph.addNode(definition, values, resource, position)
+
+        if upstream is not None:
+            node.connect(definition.getProperties(SDPropertyCategory.Input)[0], upstream,
+                         upstream.getDefinition().getProperties(SDPropertyCategory.Output)[0])
+        return node
+
+    # Output computed by Designer, 1 or 2 bytes per pixel for Grayscale, 4 or more for Color
+    def setOutputTexture(self, node, bytesPerPixel):
+        output = node.getDefinition().getProperties(SDPropertyCategory.Output)[0]
+        node.setPropertyValue(output, SDValue('SDValueTexture', SDTexture(bytesPerPixel)))
+
+    def select(self, nodes):
+        self.uiMgr.selection = SDArray(nodes)
+
+
+# The 'sd' stand-in gives this world from sd.getContext()
+_world = None
+
+def install(world):
+    global _world
+    _world = world
+    return world
+
+def currentWorld():
+    return _world
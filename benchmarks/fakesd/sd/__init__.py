@@ -0,0 +1,9 @@
+# python
+#
+# Fake 'sd' package for the benchmarks, see fakeworld.py
+
+from fakeworld import currentWorld
+
+
+def getContext():
+    return currentWorld().context
@@ -0,0 +1,2 @@
+class SDApplicationPath(object):
+    pass
@@ -0,0 +1 @@
+from fakeworld import float2, float3, float4, int2, ColorRGBA
@@ -0,0 +1,2 @@
+class SDGraphObjectFrame(object):
+    pass
@@ -0,0 +1,2 @@
+class SDGraphObjectPin(object):
+    pass
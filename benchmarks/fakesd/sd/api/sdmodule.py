@@ -0,0 +1 @@
+from fakeworld import SDModule, SDModuleMgr
@@ -0,0 +1 @@
+from fakeworld import SDPropertyCategory, SDProperty
@@ -0,0 +1 @@
+from fakeworld import SDValueSerializer
@@ -0,0 +1,452 @@
+# python
+#
+# etr_print_modified_values - Plugin benchmarks
+#
+# The three toolbar paths on the fake 'sd' world (see conftest.py and fakesd/):
+#   - Single node ('Q' with one node), 5 to 200 properties, Atomic and Instance, cold and warm reference cache,
+#     with defaults read from definitions or from Reference nodes
+#   - Batch ('Q' with a multi selection) sharing References between definitions
+#   - Graph audit ('Shift+Q') of graphs up to 5000 nodes, driven through the event loop slices
+#   - Node by node diff of two versions of a graph
+#   - Duplicate nodes of a graph
+#   - Idle time prefetch of References when a graph opens
+#   - Modified values stored in SQLite, and queried
+#   - Plugin startup (import and initializeSDPlugin) and graph view opening
+#   - Comments of a whole selection written as one undo step, without overlaps
+
+
+import sys
+import pytest
+import fakeworld
+import subprocess
+
+from PySide2 import QtCore
+
+from etr_print_modified_values.plugin import PrintModValuesToolBar
+from etr_print_modified_values.audit import GraphAudit
+
+from benchtools import BENCHMARKS_DIR, resetPluginState, runBenchmark
+
+
+PROP_COUNTS = [5, 50, 200]
+SELECTION_SIZES = [10, 100, 1000]
+GRAPH_SIZES = [50, 500, 5000]
+
+atomicLabels = ['Blend', 'Levels', 'Transformation 2D', 'Warp', 'HSL']
+libraryGraphs = ['crystal_1', 'bricks_generator', 'dirt_3']
+
+
+def printModValues(world):
+    toolbar = PrintModValuesToolBar('graphview', world.uiMgr)
+    return toolbar._PrintModValuesToolBar__onPrintModValues
+
+
+# A graph mixing Atomic and Instance nodes of a few definitions, the way real graphs reuse the same nodes. Nodes are
+# chained by 10, the first of each chain with a computed Grayscale or Color output
+def buildGraph(world, nodeCount, propCount=20, spacing=150.0):
+    graph = world.newGraph()
+    definitions = [world.addAtomicDefinition(label, propCount) for label in atomicLabels]
+    definitions += [world.addLibraryGraph(name, propCount) for name in libraryGraphs]
+
+    nodes = []
+    for index in range(nodeCount):
+        upstream = nodes[-1] if index % 10 else None
+        node = world.addNode(graph, definitions[index % len(definitions)], modifiedEvery=2 + index % 5,
+                             position=fakeworld.float2(index % 50 * spacing, index // 50 * spacing), upstream=upstream)
+        if upstream is None:
+            world.setOutputTexture(node, 4 if index % 20 else 2)
+        nodes.append(node)
+
+    return graph, nodes
+
+
+# --------------------------------------------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('cache', ['cold', 'warm'])
+@pytest.mark.parametrize('defaults', ['definition', 'referenceNode'])
+@pytest.mark.parametrize('kind', ['atomic', 'instance'])
+@pytest.mark.parametrize('propCount', PROP_COUNTS)
+def test_single_node(benchmark, world, stages, propCount, kind, defaults, cache):
+    fakeworld.config['definitionDefaults'] = defaults == 'definition'
+
+    graph = world.newGraph()
+    if kind == 'atomic':
+        definition = world.addAtomicDefinition('Blend', propCount)
+    else:
+        definition = world.addLibraryGraph('library_node', propCount)
+    node = world.addNode(graph, definition)
+    world.select([node])
+
+    run = printModValues(world)
+    if cache == 'warm':
+        run()
+
+    runBenchmark(benchmark, stages, run, setup=resetPluginState if cache == 'cold' else None, rounds=5)
+
+    # Cold rounds start a new session, so each of them creates its Comment again
+    assert node.comments and node.comments[-1].getDescription() not in ('Non Supported', 'All by default')
+
+
+@pytest.mark.parametrize('selectionSize', SELECTION_SIZES)
+def test_batch_selection(benchmark, world, stages, selectionSize):
+    graph, nodes = buildGraph(world, selectionSize)
+    world.select(nodes)
+
+    runBenchmark(benchmark, stages, printModValues(world), setup=resetPluginState, rounds=3)
+
+    assert all(node.comments for node in nodes)
+
+
+@pytest.mark.parametrize('graphSize', GRAPH_SIZES)
+def test_graph_audit(benchmark, world, stages, graphSize):
+    graph, nodes = buildGraph(world, graphSize)
+
+    def audit():
+        graphAudit = GraphAudit(graph)
+        graphAudit.start()
+        while QtCore.processEvents():
+            pass
+        return graphAudit
+
+    runBenchmark(benchmark, stages, audit, setup=resetPluginState, rounds=1 if graphSize > 1000 else 3)
+
+    assert all(node.comments for node in nodes)
+
+
+# A library package that fails to load leaves its nodes out, the rest of the graph is annotated and the audit ends.
+# So does an audit failing when writing its Comments
+def test_graph_audit_errors(world, monkeypatch):
+    from etr_print_modified_values import audit
+
+    fakeworld.config['definitionDefaults'] = False
+    graph, nodes = buildGraph(world, 80)
+    brokenPath = world.packages.popitem()[0]
+
+    graphAudit = GraphAudit(graph)
+    graphAudit.start()
+    while QtCore.processEvents():
+        pass
+
+    assert not graphAudit.isRunning()
+    broken = [node for node in nodes if node.getReferencedResource() and
+              node.getReferencedResource().getPackage().getFilePath() == brokenPath]
+    assert broken and not any(node.comments for node in broken)
+    assert all(node.comments for node in nodes if node not in broken)
+
+    def failWriting(results, graph):
+        raise RuntimeError('Comment not written')
+
+    monkeypatch.setattr(audit, 'writeComments', failWriting)
+    graphAudit = GraphAudit(graph)
+    graphAudit.start()
+    with pytest.raises(RuntimeError):
+        while QtCore.processEvents():
+            pass
+    assert not graphAudit.isRunning()
+
+
+# Same audit with tracing on, to keep an eye on its overhead (compare with test_graph_audit[500]) and its exports
+def test_graph_audit_traced(benchmark, world, stages, tmp_path):
+    from etr_print_modified_values import trace
+    from etr_print_modified_values.plugin import exportTrace
+
+    graph, nodes = buildGraph(world, 500)
+
+    def audit():
+        graphAudit = GraphAudit(graph)
+        graphAudit.start()
+        while QtCore.processEvents():
+            pass
+
+    trace.reset()
+    trace.enable()
+    try:
+        runBenchmark(benchmark, stages, audit, setup=resetPluginState, rounds=3)
+        exportTrace(str(tmp_path))
+    finally:
+        trace.disable()
+
+    assert trace.getStages()['getNodePropValues']['calls'] == 3 * 500
+    assert (tmp_path / 'trace.json').exists() and (tmp_path / 'trace.jsonl').exists()
+    trace.reset()
+
+
+# Two versions of a graph: every 10th node edited, so most of them are skipped on their fingerprint
+@pytest.mark.parametrize('graphSize', [500, 5000])
+def test_graph_diff(benchmark, world, stages, graphSize):
+    from etr_print_modified_values.modvalues import diffGraphs
+
+    oldGraph, oldNodes = buildGraph(world, graphSize)
+    newGraph, newNodes = buildGraph(world, graphSize)
+    for node in newNodes[::10]:
+        prop = node.getDefinition().getProperties(fakeworld.SDPropertyCategory.Input)[1]
+        node.setPropertyValue(prop, fakeworld.SDValue('SDValueFloat', 123.0))
+
+    runBenchmark(benchmark, stages, lambda: diffGraphs(oldGraph, newGraph, verbose=False), rounds=1)
+
+    graphDiff = diffGraphs(oldGraph, newGraph, verbose=False)
+    assert len(graphDiff.changed) == len(newNodes[::10]) and not graphDiff.added and not graphDiff.removed
+
+
+# Nodes repeat every 40 (definition and modified values), so chains 0-9 and 40-49 are duplicated all along
+@pytest.mark.parametrize('graphSize', [500, 5000])
+def test_graph_duplicates(benchmark, world, stages, graphSize):
+    from etr_print_modified_values.modvalues import findGraphDuplicates
+
+    graph, nodes = buildGraph(world, graphSize)
+
+    runBenchmark(benchmark, stages, lambda: findGraphDuplicates(graph, verbose=False), setup=resetPluginState, rounds=1)
+
+    groups = dict((group[0].identifier, set(node.identifier for node in group))
+                  for group in findGraphDuplicates(graph, verbose=False))
+    for index in range(10):
+        assert nodes[index + 40].getIdentifier() in groups[nodes[index].getIdentifier()]
+    assert nodes[1].getIdentifier() not in groups[nodes[0].getIdentifier()]
+
+
+# Opening a graph prefetches its References, so the first 'Q' on its nodes loads no package and creates no node
+def test_prefetch_on_graph_open(benchmark, world, stages, monkeypatch):
+    from etr_print_modified_values import plugin
+    from etr_print_modified_values.plugin import onNewGraphViewCreated
+
+    fakeworld.config['definitionDefaults'] = False
+    monkeypatch.setattr(plugin, 'prefetchEnabled', True)
+    graph, nodes = buildGraph(world, 500)
+
+    def openGraph():
+        onNewGraphViewCreated('graphview', world.uiMgr)
+        while QtCore.processEvents():
+            pass
+
+    runBenchmark(benchmark, stages, openGraph, setup=resetPluginState, rounds=3)
+
+    fakeworld.stats.reset()
+    world.select(nodes[:len(atomicLabels) + len(libraryGraphs)])
+    printModValues(world)()
+    calls = fakeworld.stats.snapshot()
+    assert not any(stage in calls for stage in ('newNode', 'newInstanceNode', 'loadUserPackage'))
+
+
+# Definition defaults are enough: no scratch package just for the prefetch
+def test_prefetch_without_scratch_graph(world):
+    from etr_print_modified_values.prefetch import ReferencePrefetcher
+
+    graph, nodes = buildGraph(world, 50)
+    fakeworld.stats.reset()
+    prefetcher = ReferencePrefetcher(graph)
+    prefetcher.start()
+    while QtCore.processEvents():
+        pass
+
+    assert prefetcher.fetched == len(atomicLabels) + len(libraryGraphs)
+    assert 'newUserPackage' not in fakeworld.stats.calls
+
+
+def test_prefetch_pauses_on_input(world):
+    from etr_print_modified_values.prefetch import ReferencePrefetcher
+
+    graph, nodes = buildGraph(world, 50)
+    prefetcher = ReferencePrefetcher(graph)
+    prefetcher.start()
+    QtCore.QCoreApplication.sendEvent(None, QtCore.QEvent(QtCore.QEvent.KeyPress))
+
+    QtCore.processEvents()
+    assert prefetcher.isRunning() and prefetcher.fetched == 0
+
+    prefetcher.stop()
+    assert not prefetcher.isRunning()
+
+    # Nothing over the budget
+    prefetcher = ReferencePrefetcher(graph, budget=1)
+    prefetcher.start()
+    while QtCore.processEvents():
+        pass
+    assert prefetcher.fetched == 1 and not prefetcher.isRunning()
+
+
+@pytest.mark.parametrize('graphSize', [500, 5000])
+def test_index_graph(benchmark, world, stages, tmp_path, graphSize):
+    from etr_print_modified_values.modvalues import indexGraph
+    from etr_print_modified_values.valuedb import ValueDatabase
+
+    graph, nodes = buildGraph(world, graphSize)
+    dbPath = str(tmp_path / 'values.sqlite')
+
+    runBenchmark(benchmark, stages, lambda: indexGraph(graph, dbPath), setup=resetPluginState, rounds=1)
+    rowCount = indexGraph(graph, dbPath)
+
+    with ValueDatabase(dbPath) as db:
+        assert len(db) == rowCount > 0 # Indexing again replaces the rows of the graph
+
+        rows = db.query('SELECT DISTINCT node FROM modified_values WHERE node_label = ? AND value_num IS NOT NULL',
+                        ('Blend',))
+        assert 0 < len(rows) <= graphSize // 8 + 1
+
+        # Types come from the values read, not from their text
+        types = dict(db.query('SELECT DISTINCT label, value_type FROM modified_values'))
+        assert (types['Param 5 Enum'], types['Param 8 Int2'], types['Param 3 Int']) == ('enum', 'vector', 'int')
+
+
+# Designer's launch: a fresh interpreter importing the plugin and initializing it. Nothing but the toolbar is
+# imported until the toolbar is used
+def test_plugin_startup(benchmark):
+    script = '''
+import os, sys, time
+sys.path[:0] = [os.path.join(%r, 'fakesd'), os.path.dirname(%r)]
+import fakeworld
+fakeworld.install(fakeworld.World(%r))
+start = time.perf_counter()
+import etr_print_modified_values
+etr_print_modified_values.initializeSDPlugin()
+print(time.perf_counter() - start)
+print(' '.join(sorted(m for m in sys.modules if m.startswith('etr_print_modified_values'))))
+''' % (BENCHMARKS_DIR, BENCHMARKS_DIR, BENCHMARKS_DIR)
+
+    def startup():
+        return subprocess.check_output([sys.executable, '-c', script], universal_newlines=True).split('\n')
+
+    output = benchmark.pedantic(startup, rounds=3)
+    benchmark.extra_info['startupSeconds'] = float(output[0])
+
+    assert set(output[1].split()) == set(['etr_print_modified_values', 'etr_print_modified_values.plugin',
+                                          'etr_print_modified_values.trace'])
+
+
+# Graph tabs opened one after the other: icons are rendered once, not for every graph view
+def test_graph_view_opening(benchmark, world, monkeypatch):
+    from PySide2 import QtSvg
+    from etr_print_modified_values import plugin
+
+    renders = []
+    class CountingRenderer(QtSvg.QSvgRenderer):
+        def render(self, painter):
+            renders.append(self.fileName)
+
+    monkeypatch.setattr(QtSvg, 'QSvgRenderer', CountingRenderer)
+    monkeypatch.setattr(plugin, '_icons', {})
+    world.newGraph()
+
+    benchmark.pedantic(lambda: plugin.onNewGraphViewCreated('graphview', world.uiMgr), rounds=20)
+
+    assert len(renders) == 3 # print_modified_values, print_modified_values_a and print_modified_values_live
+
+
+# Nodes 320 apart and Comments up to 10 lines and 30 characters: at the default offset, Comments would reach their
+# neighbours
+@pytest.mark.parametrize('selectionSize', [100, 1000])
+def test_bulk_comments(benchmark, world, stages, selectionSize):
+    from etr_print_modified_values.layout import getNodeRect, getCommentRect
+    from etr_print_modified_values.modvalues import getModifiedValues, writeComments
+
+    graph, nodes = buildGraph(world, selectionSize, spacing=320.0)
+    results = getModifiedValues(nodes, graph)
+
+    runBenchmark(benchmark, stages, lambda: writeComments(results, graph), setup=resetPluginState, rounds=3)
+    assert stages.snapshot(1)['sd.undoGroup']['calls'] == 3
+
+    gridSize = fakeworld.GraphGrid.sGetFirstLevelSize()
+    rects = []
+    for node in nodes:
+        position = (node.getPosition().x, node.getPosition().y)
+        offset = node.comments[-1].getPosition()
+        rects.append(getCommentRect((position[0] + offset.x, position[1] + offset.y),
+                                    node.comments[-1].getDescription(), gridSize))
+
+    nodeRects = [getNodeRect((node.getPosition().x, node.getPosition().y), gridSize) for node in nodes]
+
+    def overlap(a, b):
+        return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+    for index, rect in enumerate(rects):
+        assert not any(overlap(rect, other) for other in rects[index + 1:index + 60])
+        assert not any(overlap(rect, other) for other in nodeRects[index + 1:index + 60])
+
+
+# Node identifiers restart in every graph, each graph keeps its own Comments
+def test_comments_per_graph(world):
+    from etr_print_modified_values.modvalues import getModifiedValues, writeComments
+
+    definition = world.addAtomicDefinition('Blend', 10)
+    graphs = [world.newGraph(identifier) for identifier in ('graph_a', 'graph_b')]
+    nodes = [world.addNode(graph, definition) for graph in graphs]
+    assert nodes[0].getIdentifier() == nodes[1].getIdentifier()
+
+    for graph, node in zip(graphs, nodes):
+        writeComments(getModifiedValues([node], graph), graph)
+    writeComments(getModifiedValues([nodes[0]], graphs[0]), graphs[0])
+
+    assert [len(node.comments) for node in nodes] == [1, 1]
+
+
+# Live mode only reads the nodes of the current graph, a slice at a time, and forgets the graphs closed meanwhile
+def test_live_mode_polling(world, tmp_path, monkeypatch):
+    from etr_print_modified_values import livemode
+
+    monkeypatch.setattr(livemode, 'POLL_SLICE', 0.0) # A single node per poll
+    definition = world.addAtomicDefinition('Blend', 10)
+    graphs = [world.newGraph(name, str(tmp_path / (name + '.sbs'))) for name in ('graph_a', 'graph_b')]
+    nodes = dict((graph, [world.addNode(graph, definition) for _ in range(5)]) for graph in graphs)
+
+    annotator = livemode.LiveAnnotator(world.uiMgr)
+    annotator.start()
+    for graph in graphs:
+        assert annotator.track(nodes[graph], graph) == 5
+
+    texts = dict((node, node.comments[-1].getDescription()) for graph in graphs for node in nodes[graph])
+    prop = definition.getProperties(fakeworld.SDPropertyCategory.Input)[1]
+    for graph in graphs:
+        for node in nodes[graph]:
+            node.setPropertyValue(prop, fakeworld.SDValue('SDValueFloat', 5.0))
+
+    pollTimer = annotator._LiveAnnotator__pollTimer
+    for count in range(5):
+        pollTimer.fire()
+        assert len(annotator._LiveAnnotator__pending) == count + 1
+    annotator._LiveAnnotator__debounceTimer.fire()
+
+    assert all(node.comments[-1].getDescription() != texts[node] for node in nodes[graphs[1]])
+    assert all(node.comments[-1].getDescription() == texts[node] for node in nodes[graphs[0]])
+
+    world.context.getSDApplication().getPackageMgr().unloadUserPackage(graphs[0].getPackage())
+    pollTimer.fire()
+    assert annotator.getTrackedCount() == 5
+
+
+# References found by a batch go to disk once, and only Designer sessions of the same version read them back
+def test_reference_cache_flush(world, monkeypatch):
+    from etr_print_modified_values import refcache
+    from etr_print_modified_values.modvalues import getModifiedValues
+
+    saves = []
+    save = refcache.ReferenceCache._ReferenceCache__save
+    monkeypatch.setattr(refcache.ReferenceCache, '_ReferenceCache__save', lambda cache: saves.append(save(cache)))
+
+    graph, nodes = buildGraph(world, 50)
+    getModifiedValues(nodes, graph)
+    assert len(saves) == 1
+
+    cached = len(refcache.getReferenceCache())
+    refcache._referenceCache = None
+    assert cached and len(refcache.getReferenceCache()) == cached
+
+    fakeworld.config['version'] = '15.0.0'
+    refcache._referenceCache = None
+    assert len(refcache.getReferenceCache()) == 0
+
+
+# Live Mode annotates the selection as a single undo step, its Comments placed around the user's own Comments
+def test_live_mode_comments(world):
+    graph, nodes = buildGraph(world, 20, spacing=320.0)
+    userComment = fakeworld.SDGraphObjectComment.sNewAsChild(nodes[0])
+    userComment.setPosition(fakeworld.float2(-8.0, 8.0)) # Where our Comment would go by default
+    userComment.setDescription('Checked by the lead\n' * 3)
+    world.select(nodes)
+
+    toolbar = PrintModValuesToolBar('graphview', world.uiMgr)
+    fakeworld.stats.reset()
+    toolbar._PrintModValuesToolBar__onLiveModeToggled(True)
+
+    assert fakeworld.stats.calls['undoGroup'] == 1
+    assert all(node.comments for node in nodes)
+    assert nodes[0].comments[-1] is not userComment
+    assert nodes[0].comments[-1].getPosition() != userComment.getPosition()
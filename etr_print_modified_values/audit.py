@@ -0,0 +1,110 @@
+# python
+#
+# etr_print_modified_values - Whole graph audit
+#
+# Annotates every node of a graph with its modified values. Big graphs (500+ nodes) would freeze Designer if done
+# in one go, so the work is split in small time slices scheduled on the Qt event loop, with a cancellable progress
+# dialog in between. References are shared by the whole audit, so each definition is only built once.
+
+
+import time
+
+from PySide2 import QtCore, QtWidgets
+
+from . import trace
+from .depth import DepthResolver
+from .refcache import flushReferenceCache
+from .modvalues import getNodeModifiedValues, nonSupported, writeComments
+
+
+SLICE_DURATION = 0.03 # Seconds of work per event loop slice. Small enough to keep the UI responsive
+
+
+class GraphAudit(QtCore.QObject):
+
+    finished = QtCore.Signal()
+
+    def __init__(self, graph, parent=None):
+        super(GraphAudit, self).__init__(parent)
+
+        self.__graph = graph
+        self.__nodes = []
+        self.__index = 0
+        self.__references = {}
+        self.__depths = DepthResolver() # Grayscale/Color of every node, resolved once for the whole graph
+        self.__results = []
+        self.__cancelled = False
+        self.__running = False
+
+        self.__progress = QtWidgets.QProgressDialog(self.tr("Auditing graph..."), self.tr("Cancel"), 0, 1, parent)
+        self.__progress.setWindowTitle(self.tr("Print Modified Values"))
+        self.__progress.setWindowModality(QtCore.Qt.WindowModal)
+        self.__progress.setMinimumDuration(0)
+        self.__progress.canceled.connect(self.cancel)
+
+    def start(self):
+        # Take a snapshot of the nodes. Reference nodes go to the scratch graph of the pool (see refpool.py), but may
+        # still be created in this same graph, and deleted, when the scratch graph can't be created
+        nodes = self.__graph.getNodes()
+        self.__nodes = [nodes.getItem(i) for i in range(nodes.getSize())]
+        self.__index = 0
+        self.__running = True
+
+        self.__progress.setMaximum(max(len(self.__nodes), 1))
+        self.__progress.setValue(0)
+
+        QtCore.QTimer.singleShot(0, self.__processSlice)
+
+    def cancel(self):
+        self.__cancelled = True
+
+    def isRunning(self):
+        return self.__running
+
+    # Whatever happens in a slice (ie a node that can't be read, or a Comment that can't be written), the progress
+    # dialog is closed and the audit finished, an exception in a timer slot would leave both behind
+    def __processSlice(self):
+        done = True
+        try:
+            done = self.__runSlice()
+        finally:
+            if done:
+                self.__finish()
+
+        if not done:
+            QtCore.QTimer.singleShot(0, self.__processSlice)
+
+    # False while there are nodes left
+    def __runSlice(self):
+        if self.__cancelled:
+            print('Graph audit cancelled, no comments written')
+            return True
+
+        sliceEnd = time.perf_counter() + SLICE_DURATION
+
+        with trace.span('auditSlice'):
+            while self.__index < len(self.__nodes) and time.perf_counter() < sliceEnd:
+                node = self.__nodes[self.__index]
+                self.__index += 1
+                different_dict = getNodeModifiedValues(node, self.__graph, self.__references, self.__depths)
+
+                # A whole graph has lots of Inputs, Outputs, Frames... Only comment what we can really compare
+                if different_dict is not nonSupported:
+                    self.__results.append((node, different_dict))
+
+        self.__progress.setValue(self.__index)
+
+        if self.__index < len(self.__nodes):
+            return False
+
+        # All the comments are written at the end, in a single pass
+        writeComments(self.__results, self.__graph)
+        print(f'Graph audit done: {len(self.__results)} of {len(self.__nodes)} nodes annotated')
+        return True
+
+    def __finish(self):
+        self.__running = False
+        flushReferenceCache()
+        self.__progress.reset()
+        self.__progress.deleteLater()
+        self.finished.emit()
@@ -0,0 +1,121 @@
+# python
+#
+# etr_print_modified_values - Grayscale/Color resolution
+#
+# 'Dual Nodes' (ie LEVELS) show different parameters when acting as Grayscale or Color, which depends on what is
+# connected to them. The format of an upstream output is read from its texture when Designer has computed it, and
+# otherwise inferred: some nodes always give the same format (fixedDepthNodes), others give the format of their own
+# input (followInputNodes), so the answer is searched further upstream.
+#
+# A resolver memoizes the connections and the inferred format of every node it visits, so resolving all the nodes
+# of a graph is a single pass over nodes and connections, not one walk upstream per node. Walks are iterative, deep
+# chains of nodes don't hit the recursion limit.
+
+
+from sd.api.sdproperty import SDPropertyCategory
+
+from .report import followInputNodes, fixedDepthNodes
+
+
+class DepthResolver(object):
+
+    def __init__(self):
+        self.__upstream = {} # Node identifier: (upstream node, upstream output property) of its first input, or None
+        self.__inferred = {} # Node identifier: inferred format of its output, 'gray', 'color' or None if unknown
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Format given to a node by its (first) connected input, None if unknown or not connected
+    def getInputDepth(self, node):
+        upstream = self.__getUpstream(node)
+        if upstream is None:
+            return None
+        return self.getOutputDepth(*upstream)
+
+    # Format of an output of a node, read from its texture or inferred
+    def getOutputDepth(self, node, outputProp=None):
+        depth = getTextureDepth(node, outputProp)
+        if depth is not None:
+            return depth
+        return self.__getInferredDepth(node)
+
+    # ------------------------------------------------------------------------------------------------------------
+
+    def __getUpstream(self, node):
+        nodeId = node.getIdentifier()
+        if nodeId in self.__upstream:
+            return self.__upstream[nodeId]
+
+        upstream = None
+        try:
+            for prop in node.getProperties(SDPropertyCategory.Input):
+                if not prop.isConnectable():
+                    continue
+                connections = node.getPropertyConnections(prop)
+                if connections and connections.getSize():
+                    conn = connections.getItem(0)
+                    upstream = (conn.getInputPropertyNode(), conn.getInputProperty())
+                    break
+        except:
+            upstream = None
+
+        self.__upstream[nodeId] = upstream
+        return upstream
+
+    # Walk upstream through nodes following their input, until a known format. Every node of the walk gets the result
+    def __getInferredDepth(self, node):
+        walked = []
+        walkedIds = set()
+        depth = None
+
+        while True:
+            nodeId = node.getIdentifier()
+            if nodeId in self.__inferred:
+                depth = self.__inferred[nodeId]
+                break
+
+            nodeLabel = getNodeLabel(node)
+            if nodeLabel in fixedDepthNodes:
+                depth = fixedDepthNodes[nodeLabel]
+                self.__inferred[nodeId] = depth
+                break
+
+            if nodeLabel not in followInputNodes or nodeId in walkedIds: # Nothing to follow, or a loop
+                self.__inferred.setdefault(nodeId, None)
+                break
+
+            walked.append(nodeId)
+            walkedIds.add(nodeId)
+            upstream = self.__getUpstream(node)
+            if upstream is None:
+                break
+
+            upstreamNode, upstreamProp = upstream
+            depth = getTextureDepth(upstreamNode, upstreamProp)
+            if depth is not None:
+                break
+            node = upstreamNode
+
+        for nodeId in walked:
+            self.__inferred[nodeId] = depth
+        return depth
+
+
+# Get the nice label (the top title in the node), None for nodes without definition
+def getNodeLabel(node):
+    try:
+        return node.getDefinition().getLabel()
+    except:
+        return None
+
+
+# Format of an already computed output texture: more than 2 bytes per pixel is Color. None if not computed
+def getTextureDepth(node, outputProp):
+    if outputProp is None:
+        return None
+
+    try:
+        bytesPerPixel = node.getPropertyValue(outputProp).get().getBytesPerPixel()
+    except:
+        return None
+
+    return 'color' if bytesPerPixel > 2 else 'gray'
@@ -0,0 +1,135 @@
+# python
+#
+# etr_print_modified_values - Duplicate nodes
+#
+# Finds nodes doing exactly the same work: same definition, same modified values (the 'different' dictionary written
+# in Comments) and same inputs. Inputs are compared through the fingerprint of the upstream node, not its identifier,
+# so two identical chains of nodes are found duplicated all along, not only at their first node.
+#
+# Fingerprints are computed once per node, upstream first (iterative depth first walk, memoized), then nodes are
+# grouped by fingerprint: a single hashing pass over nodes and connections. In Designer, from the toolbar, or
+# headless for whole packages:
+#
+#   python -m etr_print_modified_values.duplicates my_package.sbs --library-dir "<Designer>/resources/packages"
+
+
+import os
+import sys
+import argparse
+
+from collections import OrderedDict, namedtuple
+
+from .fingerprint import getNodeFingerprint, hashText
+from .report import nonSupported
+from .sbsreader import readPackage
+
+
+# A node to hash. 'upstream' is a tuple of (input identifier, upstream node identifier, upstream output or None)
+HashNode = namedtuple('HashNode', 'identifier definition label different upstream')
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Fingerprint of every node, as {identifier: fingerprint}. Non supported nodes can't be compared: they get a
+# fingerprint of their own, so nodes fed by them are only duplicates when fed by the very same node
+def getFingerprints(nodes):
+    byId = dict((node.identifier, node) for node in nodes)
+    fingerprints = {}
+
+    for root in nodes:
+        stack = [(root, False)]
+        walking = set()
+
+        while stack:
+            node, upstreamDone = stack.pop()
+            if node.identifier in fingerprints:
+                continue
+
+            if not upstreamDone:
+                walking.add(node.identifier)
+                stack.append((node, True))
+                for _, upstreamId, _ in node.upstream:
+                    if upstreamId in byId and upstreamId not in fingerprints and upstreamId not in walking:
+                        stack.append((byId[upstreamId], False))
+                continue
+
+            walking.discard(node.identifier)
+            fingerprints[node.identifier] = getHashNodeFingerprint(node, fingerprints)
+
+    return fingerprints
+
+
+def getHashNodeFingerprint(node, fingerprints):
+    if node.definition is None or node.different == nonSupported:
+        return hashText('unique\x00%s' % node.identifier)
+
+    # Upstream nodes out of the list (or in a loop) are identified by themselves
+    upstream = [(inputId, '%s:%s' % (fingerprints.get(upstreamId, 'node:%s' % upstreamId), output or ''))
+                for inputId, upstreamId, output in node.upstream]
+
+    return getNodeFingerprint(node.definition, node.different, upstream)
+
+
+# Groups of identical nodes (2 or more), in the order of the nodes given
+def findDuplicates(nodes):
+    fingerprints = getFingerprints(nodes)
+
+    groups = OrderedDict()
+    for node in nodes:
+        groups.setdefault(fingerprints[node.identifier], []).append(node)
+
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def formatDuplicates(groups, indent=''):
+    lines = []
+    for group in groups:
+        lines.append(f'{indent}{len(group)} x {group[0].label or group[0].definition}: '
+                     + ', '.join(node.identifier for node in group))
+
+    redundant = sum(len(group) - 1 for group in groups)
+    lines.append(f'{indent}{len(groups)} groups of duplicates, {redundant} nodes could be merged')
+    return '\n'.join(lines)
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- PACKAGES ----------------------------------------------------------------------------------------------
+#
+
+# Duplicates of every graph of a package, as {graph identifier: groups}
+def findPackageDuplicates(packagePath, libraryDirs=()):
+    graphs = OrderedDict()
+    for node in readPackage(packagePath, libraryDirs):
+        upstream = tuple((inputId, connRef, None) for inputId, connRef, _ in node.connections)
+        graphs.setdefault(node.graph, []).append(
+            HashNode(node.uid, node.definition, node.label, node.different, upstream))
+
+    return OrderedDict((graphName, findDuplicates(nodes)) for graphName, nodes in graphs.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find duplicate nodes in .sbs packages, without Designer')
+    parser.add_argument('packages', nargs='+', help='.sbs files to read')
+    parser.add_argument('--library-dir', action='append', default=[],
+                        help="Folder to resolve 'sbs://' dependencies, ie '<Designer>/resources/packages'. Repeatable")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for packagePath in args.packages:
+        try:
+            packageGroups = findPackageDuplicates(packagePath, args.library_dir)
+        except Exception as e: # Like scanner.scanPackage, one bad package doesn't stop the others
+            print(f'Could not read {packagePath}: {e}', file=sys.stderr)
+            failed += 1
+            continue
+
+        for graphName, groups in packageGroups.items():
+            if groups:
+                print(f'{os.path.basename(packagePath)} | {graphName}')
+                print(formatDuplicates(groups, '    '))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
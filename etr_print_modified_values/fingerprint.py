@@ -0,0 +1,68 @@
+# python
+#
+# etr_print_modified_values - Parameter fingerprints
+#
+# Hashes of label/value maps (as read by getNodePropValues, or the 'different' dictionaries of the headless reader),
+# so nodes can be matched and compared through dictionary lookups instead of comparing every pair of dictionaries.
+#
+#   - Values are made canonical first: floats rounded to 'roundN' (what Comments show), -0.0 as 0.0, tuples and
+#     KeyArrays element by element, so the hash doesn't depend on noise nor on Python types. With digits=None floats
+#     are kept as they are, for checks that must not miss changes smaller than what Comments show
+#   - A map is hashed from its sorted parameter hashes, so its order doesn't matter
+#
+# No 'sd' here, the in-app and headless paths share the same fingerprints.
+
+
+import hashlib
+
+from .report import roundN, KeyArray
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Canonical text of a plain value
+
+def canonicalValue(value, digits=roundN):
+    if isinstance(value, bool):
+        return 'B1' if value else 'B0'
+
+    if isinstance(value, float):
+        return 'F' + repr((value if digits is None else round(value, digits)) + 0.0)
+
+    if isinstance(value, int):
+        return 'I%d' % value
+
+    if isinstance(value, KeyArray):
+        return 'K' + canonicalValue(tuple(tuple(row) for row in value.toList()), digits)
+
+    if isinstance(value, (tuple, list)):
+        return '(' + ','.join(canonicalValue(v, digits) for v in value) + ')'
+
+    return 'S' + str(value)
+
+
+def hashText(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Fingerprints
+
+# {label: hash of label and value}, to tell which parameters of two maps differ without comparing values
+def getParamFingerprints(values_dict, digits=roundN):
+    return dict((label, hashText('%s\x00%s' % (label, canonicalValue(value, digits))))
+                for label, value in values_dict.items())
+
+
+# Order independent hash of a whole label/value map
+def getValuesFingerprint(values_dict, paramFingerprints=None):
+    if paramFingerprints is None:
+        paramFingerprints = getParamFingerprints(values_dict)
+    return hashText('\x00'.join(sorted(paramFingerprints.values())))
+
+
+# Hash of a node: its definition, its values and, optionally, what is connected to it as (input identifier,
+# upstream node fingerprint) pairs. Inputs are sorted, so only which upstream goes to which input matters
+def getNodeFingerprint(definition, values_dict, upstream=()):
+    return hashText('%s\x00%s\x00%s' % (
+        definition, getValuesFingerprint(values_dict),
+        ','.join('%s=%s' % pair for pair in sorted(upstream))))
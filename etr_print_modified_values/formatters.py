@@ -0,0 +1,157 @@
+# python
+#
+# etr_print_modified_values - Value readers
+#
+# One reader per SDValue class, keyed on 'value.getClassName()'. They read native values through the SDValue
+# accessors (get(), .x/.y, .r/.g/.b/.a...) instead of serializing every value to a string and parsing it back.
+# Only classes without a reader go through the serializer, via the 'fallback' given by the caller.
+#
+# No 'sd' import here: readers only rely on the accessors, so they also run with the benchmark stand-ins.
+
+
+import re
+
+from . import trace
+from .report import formatNative, KeyArray, EnumValue
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Enumerators of each SDTypeEnum, as {integer value: nice name}. Built once per enum type, not once per property
+
+_enumTables = {}
+
+def getEnumTable(enumType):
+    typeId = enumType.getId()
+    table = _enumTables.get(typeId)
+
+    if table is None:
+        table = {}
+        for enum in enumType.getEnumerators():
+            table[enum.getDefaultValue().get()] = EnumValue(enum.getId().title()) # Some results are lower case. Best feedback in Uppercase
+        _enumTables[typeId] = table
+
+    return table
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Members of each SDTypeStruct, sorted by id so every key of an array is flattened in the same order
+
+_structMembers = {}
+
+def getStructMembers(structType):
+    typeId = structType.getId()
+    members = _structMembers.get(typeId)
+
+    if members is None:
+        members = sorted(structType.getMembers(), key=lambda member: member.getId())
+        _structMembers[typeId] = members
+
+    return members
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Readers. All of them get an SDValue and return a plain Python value: float, int, bool, str or
+# tuple of floats/ints, KeyArray for arrays. Those are compared with tolerance and only formatted (report.formatNative) when different
+
+def readEnum(value):
+    return getEnumTable(value.getType())[value.get()]
+
+def readArray(value):
+    rows = []
+
+    for index in range(value.getSize()):
+        item = value.getItem(index)
+
+        # Only arrays of structs (Curve, Gradient Map keys...) are decoded, anything else is just shown as before
+        if item.getClassName() != 'SDValueStruct':
+            return 'GRAPH'
+
+        row = []
+        for member in getStructMembers(item.getType()):
+            memberValue = readValue(item.getPropertyValue(member))
+            row.extend(memberValue if isinstance(memberValue, tuple) else (memberValue,))
+        rows.append(row)
+
+    try:
+        return KeyArray(rows)
+    except (TypeError, ValueError): # Non numeric members, or keys of different sizes
+        return 'GRAPH'
+
+def readInt(value):
+    return value.get()
+
+def readInt2(value):
+    v = value.get()
+    return v.x, v.y
+
+def readFloat(value):
+    return value.get()
+
+def readFloat2(value):
+    v = value.get()
+    return v.x, v.y
+
+def readFloat3(value):
+    v = value.get()
+    return v.x, v.y, v.z
+
+def readFloat4(value):
+    v = value.get()
+    return v.x, v.y, v.z, v.w
+
+def readColorRGBA(value):
+    v = value.get()
+    return v.r, v.g, v.b, v.a
+
+def readBool(value):
+    return bool(value.get())
+
+def readString(value):
+    return value.get()
+
+
+valueReaders = {
+    'SDValueEnum' : readEnum,
+    'SDValueArray' : readArray,
+    'SDValueInt' : readInt,
+    'SDValueInt2' : readInt2,
+    'SDValueFloat' : readFloat,
+    'SDValueFloat2' : readFloat2,
+    'SDValueFloat3' : readFloat3,
+    'SDValueFloat4' : readFloat4,
+    'SDValueColorRGBA' : readColorRGBA,
+    'SDValueBool' : readBool,
+    'SDValueString' : readString
+}
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# For classes without reader (ie SDValueTexture): clean the serialized string, from 'SDValueX(x(content))'
+# to 'content'
+
+_serializedPattern = re.compile(r'^SDValue\w*\((?:\w+\()?(.*?)\)*$', re.DOTALL)
+
+def cleanSerializedValue(serialized):
+    match = _serializedPattern.match(serialized)
+    return match.group(1) if match else 'UNKNOW'
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Read any SDValue as plain Python value. 'fallback' serializes values of unknown classes to string
+def readValue(value, fallback=None):
+    reader = valueReaders.get(value.getClassName())
+
+    if reader is not None:
+        return reader(value)
+
+    if fallback is not None:
+        serialized = fallback(value)
+        with trace.span('cleanSerializedValue'):
+            return cleanSerializedValue(serialized)
+
+    return 'UNKNOW'
+
+
+# Read and format at once, the way a single value is shown in Comments
+def formatValue(value, fallback=None):
+    return formatNative(readValue(value, fallback))
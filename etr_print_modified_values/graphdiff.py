@@ -0,0 +1,228 @@
+# python
+#
+# etr_print_modified_values - Node by node diff
+#
+# Compares two versions of a graph: which nodes were added, removed, and which parameters changed in the nodes kept.
+# Works on plain node records, so the same diff serves two graphs open in Designer (see modvalues.diffGraphs) and two
+# .sbs files read headless:
+#
+#   python -m etr_print_modified_values.graphdiff old_version.sbs new_version.sbs --library-dir "<Designer>/resources/packages"
+#
+# Nodes are matched by identifier, then by definition and position (ie a node recreated at the same place), then by
+# definition and values (ie a node only moved). Every step is a dictionary lookup on hashes (fingerprint.py), and
+# nodes with the same fingerprint are not compared further, so big graphs diff in linear time.
+
+
+import os
+import sys
+import argparse
+
+from collections import OrderedDict, namedtuple
+
+from .fingerprint import getParamFingerprints, getValuesFingerprint
+from .report import formatNative, betterValue, valuesEqual
+from .sbsreader import readPackage
+
+
+# A node to compare. 'values' is its label/value map, 'position' a (x, y) tuple or None
+NodeRecord = namedtuple('NodeRecord', 'identifier definition label position values')
+
+# Parameters changed in a node kept between both versions. 'changed' is {label: (old value, new value)}
+NodeDiff = namedtuple('NodeDiff', 'old new added removed changed')
+
+# Result for a whole graph: added and removed are NodeRecords, changed are NodeDiffs
+GraphDiff = namedtuple('GraphDiff', 'added removed changed unchanged')
+
+POSITION_GRID = 1.0 # Positions closer than this are the same place
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Matching
+
+def getPositionKey(record):
+    if record.position is None:
+        return None
+    return (record.definition,) + tuple(int(round(p / POSITION_GRID)) for p in record.position)
+
+
+# Pair the records of both versions, as ([(old, new)], unmatched old, unmatched new)
+def matchNodes(oldRecords, newRecords):
+    pairs = []
+    newById = OrderedDict((record.identifier, record) for record in newRecords)
+    unmatchedOld = []
+
+    # By identifier, as long as the definition is the same (otherwise it's another node reusing the identifier)
+    for old in oldRecords:
+        new = newById.get(old.identifier)
+        if new is not None and new.definition == old.definition:
+            pairs.append((old, new))
+            del newById[old.identifier]
+        else:
+            unmatchedOld.append(old)
+
+    # Then by definition and position, then by definition and values
+    keys = [getPositionKey, lambda record: (record.definition, getValuesFingerprint(record.values))]
+    unmatchedNew = list(newById.values())
+
+    for getKey in keys:
+        newByKey = {}
+        for new in unmatchedNew:
+            key = getKey(new)
+            if key is not None:
+                newByKey.setdefault(key, []).append(new)
+
+        stillOld = []
+        for old in unmatchedOld:
+            candidates = newByKey.get(getKey(old))
+            if candidates:
+                pairs.append((old, candidates.pop(0)))
+            else:
+                stillOld.append(old)
+
+        matched = set(id(new) for _, new in pairs)
+        unmatchedOld = stillOld
+        unmatchedNew = [new for new in unmatchedNew if id(new) not in matched]
+
+    return pairs, unmatchedOld, unmatchedNew
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Diff
+
+# Parameters differing between two matched records, None when they are the same. Hashes keep floats unrounded, so
+# changes under the Comments precision still reach the tolerance check
+def diffRecords(old, new):
+    oldHashes = getParamFingerprints(old.values, digits=None)
+    newHashes = getParamFingerprints(new.values, digits=None)
+
+    if getValuesFingerprint(old.values, oldHashes) == getValuesFingerprint(new.values, newHashes):
+        return None
+
+    added = OrderedDict((label, value) for label, value in new.values.items() if label not in old.values)
+    removed = OrderedDict((label, value) for label, value in old.values.items() if label not in new.values)
+    changed = OrderedDict()
+
+    for label, value in new.values.items():
+        if label in old.values and oldHashes[label] != newHashes[label]:
+            # Hashes tell any change, the tolerance decides what really changed
+            if not valuesEqual(value, old.values[label]):
+                changed[label] = (old.values[label], value)
+
+    if not (added or removed or changed):
+        return None
+    return NodeDiff(old, new, added, removed, changed)
+
+
+def diffNodes(oldRecords, newRecords):
+    pairs, removed, added = matchNodes(oldRecords, newRecords)
+
+    changed = []
+    unchanged = 0
+    for old, new in pairs:
+        nodeDiff = diffRecords(old, new)
+        if nodeDiff is None:
+            unchanged += 1
+        else:
+            changed.append(nodeDiff)
+
+    return GraphDiff(added, removed, changed, unchanged)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Report
+
+def formatDiffValue(value):
+    value = betterValue(formatNative(value))
+    if isinstance(value, tuple):
+        return ' '.join(value)
+    return value
+
+# Old and new values of a change. Changes under the Comments precision show all their digits, not the same value twice
+def formatChange(oldValue, newValue):
+    oldText, newText = formatDiffValue(oldValue), formatDiffValue(newValue)
+    if oldText == newText:
+        oldText, newText = formatExactValue(oldValue), formatExactValue(newValue)
+    return f'{oldText} -> {newText}'
+
+def formatExactValue(value):
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, tuple):
+        return ' '.join(formatExactValue(v) for v in value)
+    return formatDiffValue(value)
+
+def describeRecord(record):
+    return '%s [%s]' % (record.label or record.definition, record.identifier)
+
+def formatGraphDiff(graphDiff, indent=''):
+    lines = []
+
+    for record in graphDiff.added:
+        lines.append(f'{indent}+ {describeRecord(record)}')
+    for record in graphDiff.removed:
+        lines.append(f'{indent}- {describeRecord(record)}')
+
+    for nodeDiff in graphDiff.changed:
+        lines.append(f'{indent}~ {describeRecord(nodeDiff.new)}')
+        for label, value in nodeDiff.added.items():
+            lines.append(f'{indent}    + {label} {formatDiffValue(value)}')
+        for label, value in nodeDiff.removed.items():
+            lines.append(f'{indent}    - {label} {formatDiffValue(value)}')
+        for label, (oldValue, newValue) in nodeDiff.changed.items():
+            lines.append(f'{indent}    ~ {label} {formatChange(oldValue, newValue)}')
+
+    lines.append(f'{indent}{len(graphDiff.added)} added, {len(graphDiff.removed)} removed, '
+                 f'{len(graphDiff.changed)} changed, {graphDiff.unchanged} unchanged')
+    return '\n'.join(lines)
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- PACKAGES ----------------------------------------------------------------------------------------------
+#
+
+# Records of every graph of a package, as {graph identifier: [NodeRecord]}. Values are the plain, unrounded values
+# the headless reader found modified, so parameters back to default show as removed
+def readPackageRecords(packagePath, libraryDirs=()):
+    graphs = OrderedDict()
+    for node in readPackage(packagePath, libraryDirs):
+        graphs.setdefault(node.graph, []).append(
+            NodeRecord(node.uid, node.definition, node.label, node.position, node.modified))
+    return graphs
+
+
+# Diff of every graph of two packages, as {graph identifier: GraphDiff}. Graphs only in one of them have all their
+# nodes added or removed
+def diffPackages(oldPath, newPath, libraryDirs=()):
+    oldGraphs = readPackageRecords(oldPath, libraryDirs)
+    newGraphs = readPackageRecords(newPath, libraryDirs)
+
+    diffs = OrderedDict()
+    for graphName in list(oldGraphs) + [name for name in newGraphs if name not in oldGraphs]:
+        diffs[graphName] = diffNodes(oldGraphs.get(graphName, []), newGraphs.get(graphName, []))
+    return diffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Node by node diff of two .sbs packages, without Designer')
+    parser.add_argument('old', help='Old version of the package')
+    parser.add_argument('new', help='New version of the package')
+    parser.add_argument('--library-dir', action='append', default=[],
+                        help="Folder to resolve 'sbs://' dependencies, ie '<Designer>/resources/packages'. Repeatable")
+    args = parser.parse_args(argv)
+
+    try:
+        diffs = diffPackages(args.old, args.new, args.library_dir)
+    except Exception as e:
+        print(f'Could not diff {args.old} and {args.new}: {e}', file=sys.stderr)
+        return 1
+
+    for graphName, graphDiff in diffs.items():
+        print(f'{os.path.basename(args.new)} | {graphName}')
+        print(formatGraphDiff(graphDiff, '    '))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
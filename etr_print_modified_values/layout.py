@@ -0,0 +1,122 @@
+# python
+#
+# etr_print_modified_values - Comment placement
+#
+# Every Comment used to go at the same offset of its node, so the Comments of nodes close to each other (or long
+# Comments reaching the next row of nodes) overlapped. Here each new Comment gets the first offset overlapping no
+# other node nor Comment: the usual one, at the right of the node, or moving down one grid step at a time. Graphs too
+# packed for that keep the usual offset.
+#
+# Bounds of nodes and Comments are kept in a grid of buckets (SpatialIndex), so checking a position only looks at
+# the few rectangles around it. Nodes are placed sorted by position, so a whole graph is laid out in O(n log n).
+#
+# The API gives no size for nodes nor Comments: nodes are taken as NODE_SIZE grid cells wide, and Comments are
+# sized from their text. No 'sd' here, positions are plain (x, y) tuples.
+
+
+NODE_SIZE = 6 # Grid cells, nodes are 96 pixels wide with the default 16 pixels grid
+CHAR_WIDTH = 0.45 # Grid cells per character of Comment text
+LINE_HEIGHT = 1.0 # Grid cells per line of Comment text
+MAX_SHIFTS = 32 # Grid steps tried below the default offset, before giving up and keeping the default
+
+
+class SpatialIndex(object):
+
+    def __init__(self, cellSize):
+        self.__cellSize = float(cellSize)
+        self.__cells = {} # (column, row): [(rect, key)]
+
+    def __getCells(self, rect):
+        x0, y0, x1, y1 = [int(c // self.__cellSize) for c in rect]
+        for column in range(x0, x1 + 1):
+            for row in range(y0, y1 + 1):
+                yield column, row
+
+    # 'rect' is (left, top, right, bottom)
+    def insert(self, rect, key=None):
+        for cell in self.__getCells(rect):
+            self.__cells.setdefault(cell, []).append((rect, key))
+
+    # True if 'rect' overlaps any rectangle, but the ones inserted with the 'ignore' key
+    def overlaps(self, rect, ignore=None):
+        left, top, right, bottom = rect
+        for cell in self.__getCells(rect):
+            for (otherLeft, otherTop, otherRight, otherBottom), key in self.__cells.get(cell, ()):
+                if key is not None and key == ignore:
+                    continue
+                if left < otherRight and otherLeft < right and top < otherBottom and otherTop < bottom:
+                    return True
+        return False
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Bounds
+
+def getNodeRect(position, gridSize):
+    half = NODE_SIZE * gridSize * 0.5
+    return (position[0] - half, position[1] - half, position[0] + half, position[1] + half)
+
+def getCommentRect(position, text, gridSize):
+    lines = text.split('\n')
+    width = max(len(line) for line in lines) * CHAR_WIDTH * gridSize
+    height = len(lines) * LINE_HEIGHT * gridSize
+    return (position[0], position[1], position[0] + width, position[1] + height)
+
+
+class CommentLayout(object):
+
+    def __init__(self, gridSize):
+        self.__gridSize = gridSize
+        self.__index = SpatialIndex(NODE_SIZE * gridSize)
+
+    # The default offset of a Comment from its node, where it went before
+    def getDefaultOffset(self):
+        return (-self.__gridSize * 0.5, self.__gridSize * 0.5)
+
+    def addNode(self, key, position):
+        self.__index.insert(getNodeRect(position, self.__gridSize), key)
+
+    # A Comment already there (ie written by an earlier run), at 'offset' from its node
+    def addComment(self, nodePosition, offset, text):
+        position = (nodePosition[0] + offset[0], nodePosition[1] + offset[1])
+        self.__index.insert(getCommentRect(position, text, self.__gridSize))
+
+    # Offsets tried for a new Comment, in order: the default one, at the right of the node, then below the default
+    def getCandidateOffsets(self):
+        defaultX, defaultY = self.getDefaultOffset()
+        half = NODE_SIZE * self.__gridSize * 0.5
+
+        yield defaultX, defaultY
+        yield half + self.__gridSize * 0.5, -half
+        for shift in range(1, MAX_SHIFTS + 1):
+            yield defaultX, defaultY + shift * self.__gridSize
+
+    # Offset from its node for a new Comment, the default one if there is no free place around. Its own node is not
+    # an obstacle, child Comments sit on it
+    def place(self, key, nodePosition, text):
+        offset = self.getDefaultOffset()
+
+        for candidate in self.getCandidateOffsets():
+            position = (nodePosition[0] + candidate[0], nodePosition[1] + candidate[1])
+            if not self.__index.overlaps(getCommentRect(position, text, self.__gridSize), ignore=key):
+                offset = candidate
+                break
+
+        self.__index.insert(getCommentRect((nodePosition[0] + offset[0], nodePosition[1] + offset[1]),
+                                           text, self.__gridSize))
+        return offset
+
+
+# Offsets of new Comments for a batch, as {key: offset}. 'nodes' are (key, position) of every node of the graph,
+# 'comments' (node position, offset, text) of the Comments already there and 'new' (key, node position, text) of the
+# Comments to place
+def placeComments(gridSize, nodes, comments, new):
+    layout = CommentLayout(gridSize)
+
+    for key, position in nodes:
+        layout.addNode(key, position)
+    for nodePosition, offset, text in comments:
+        layout.addComment(nodePosition, offset, text)
+
+    return dict((key, layout.place(key, nodePosition, text))
+                for key, nodePosition, text in sorted(new, key=lambda item: (item[1][1], item[1][0])))
@@ -0,0 +1,227 @@
+# python
+#
+# etr_print_modified_values - Live mode
+#
+# Keeps the Comments of annotated nodes up to date while artists tweak them. The Designer Python API has no
+# property-changed callback, so tracked nodes are polled on the Qt event loop: reading native values is cheap, and
+# only when something changed the refresh is scheduled. Changes are debounced and coalesced (dragging a slider
+# gives a single refresh), only the changed properties are compared again against the cached Reference, and the
+# Comment is only rewritten when its text really changes.
+#
+# Polling is bounded so many tracked nodes never freeze Designer: only the nodes of the current graph are read (the
+# ones being tweaked), at most POLL_SLICE seconds per poll, each poll going on where the last one stopped. Nodes of
+# packages closed meanwhile stop being tracked.
+
+
+import sd
+import time
+
+from collections import OrderedDict
+
+from PySide2 import QtCore
+
+from .modvalues import getNodeValues, getNodePropValues, getGraphKey, writeComment, writeCommentTexts
+from .report import getDifference, finishDifferentValues, formatDifferentValues, valuesEqual
+
+
+POLL_INTERVAL = 400 # Milliseconds between two reads of the tracked nodes
+POLL_SLICE = 0.01 # Seconds of reading per poll, the nodes left are read by the next polls
+DEBOUNCE_DELAY = 300 # Milliseconds without changes before refreshing the Comments
+
+
+class LiveNode(object):
+    __slots__ = ('node', 'graph', 'nodeLabel', 'nodeDepth', 'modifNode_dict', 'referNode_dict', 'differences', 'text')
+
+    def __init__(self, node, graph, nodeLabel, nodeDepth, modifNode_dict, referNode_dict):
+        self.node = node
+        self.graph = graph
+        self.nodeLabel = nodeLabel
+        self.nodeDepth = nodeDepth
+        self.modifNode_dict = modifNode_dict
+        self.referNode_dict = referNode_dict
+        self.text = None
+
+        # Formatted difference of every property differing from the Reference
+        self.differences = {}
+        for key, value in modifNode_dict.items():
+            difference = getDifference(key, value, referNode_dict)
+            if difference is not None:
+                self.differences[key] = difference
+
+    # Compare again only the changed properties
+    def update(self, modifNode_dict, changedKeys):
+        self.modifNode_dict = modifNode_dict
+
+        for key in changedKeys:
+            difference = None
+            if key in modifNode_dict:
+                difference = getDifference(key, modifNode_dict[key], self.referNode_dict)
+
+            if difference is None:
+                self.differences.pop(key, None)
+            else:
+                self.differences[key] = difference
+
+    def getText(self):
+        different_dict = OrderedDict(
+            (key, self.differences[key]) for key in self.modifNode_dict if key in self.differences)
+        return formatDifferentValues(finishDifferentValues(different_dict))
+
+
+class LiveAnnotator(QtCore.QObject):
+
+    def __init__(self, uiMgr, parent=None):
+        super(LiveAnnotator, self).__init__(parent)
+
+        self.__uiMgr = uiMgr
+        self.__tracked = OrderedDict() # getGraphKey: OrderedDict of node identifier: LiveNode, in polling order
+        self.__references = {}
+        self.__pending = {} # getCommentKey: set of changed property labels, coalesced until the next refresh
+
+        self.__pollTimer = QtCore.QTimer(self)
+        self.__pollTimer.setInterval(POLL_INTERVAL)
+        self.__pollTimer.timeout.connect(self.__poll)
+
+        self.__debounceTimer = QtCore.QTimer(self)
+        self.__debounceTimer.setSingleShot(True)
+        self.__debounceTimer.setInterval(DEBOUNCE_DELAY)
+        self.__debounceTimer.timeout.connect(self.__refresh)
+
+    def isActive(self):
+        return self.__pollTimer.isActive()
+
+    def start(self):
+        self.__pollTimer.start()
+
+    def stop(self):
+        self.__pollTimer.stop()
+        self.__debounceTimer.stop()
+        self.__tracked.clear()
+        self.__pending.clear()
+
+    def getTrackedCount(self):
+        return sum(len(nodes) for nodes in self.__tracked.values())
+
+    # Annotate nodes of a graph and keep their Comments up to date from now on. Non supported nodes are left out,
+    # returns how many are tracked
+    def track(self, nodes, graph):
+        graphNodes = self.__tracked.setdefault(getGraphKey(graph), OrderedDict())
+        liveNodes = []
+
+        for node in nodes:
+            try:
+                nodeValues = getNodeValues(node, graph, self.__references)
+            except Exception as error:
+                print(f'Could not read node {node.getIdentifier()}: {error}')
+                continue
+
+            if nodeValues is not None:
+                liveNode = LiveNode(node, graph, *nodeValues)
+                graphNodes[node.getIdentifier()] = liveNode
+                liveNodes.append(liveNode)
+
+        if not graphNodes:
+            del self.__tracked[getGraphKey(graph)]
+
+        self.__write(graph, liveNodes)
+        return len(liveNodes)
+
+    def __untrack(self, graphKey, nodeId):
+        nodes = self.__tracked.get(graphKey)
+        if nodes is not None:
+            nodes.pop(nodeId, None)
+            if not nodes:
+                del self.__tracked[graphKey]
+        self.__pending.pop(graphKey + (nodeId,), None)
+
+    def __poll(self):
+        self.__untrackClosedGraphs()
+
+        try:
+            graphKey = getGraphKey(self.__uiMgr.getCurrentGraph())
+        except:
+            return
+
+        nodes = self.__tracked.get(graphKey)
+        if not nodes:
+            return
+
+        sliceEnd = time.perf_counter() + POLL_SLICE
+        for _ in range(len(nodes)):
+            nodeId, liveNode = next(iter(nodes.items()))
+            nodes.move_to_end(nodeId) # Next poll goes on with the nodes not read this time
+            self.__pollNode(graphKey, nodeId, liveNode)
+
+            if not nodes or time.perf_counter() >= sliceEnd:
+                break
+
+    def __pollNode(self, graphKey, nodeId, liveNode):
+        try:
+            modifNode_dict = getNodePropValues(liveNode.node, liveNode.nodeLabel, liveNode.nodeDepth)
+        except:
+            self.__untrack(graphKey, nodeId) # Node deleted meanwhile
+            return
+
+        previous_dict = liveNode.modifNode_dict
+        changedKeys = set(key for key in previous_dict if key not in modifNode_dict)
+        for key, value in modifNode_dict.items():
+            if key not in previous_dict or not valuesEqual(value, previous_dict[key], 0.0, 0.0):
+                changedKeys.add(key)
+
+        if changedKeys:
+            liveNode.modifNode_dict = modifNode_dict
+            self.__pending.setdefault(graphKey + (nodeId,), set()).update(changedKeys)
+            self.__debounceTimer.start() # Restarting it is what debounces
+
+    # Unsaved packages have no file path to look for, their nodes are untracked once they can't be read
+    def __untrackClosedGraphs(self):
+        if not any(packagePath for packagePath, _ in self.__tracked):
+            return
+
+        try:
+            packages = sd.getContext().getSDApplication().getPackageMgr().getUserPackages()
+            openPaths = set(packages.getItem(i).getFilePath() for i in range(packages.getSize()))
+        except:
+            return
+
+        for graphKey in [key for key in self.__tracked if key[0] and key[0] not in openPaths]:
+            for nodeId in list(self.__tracked[graphKey]):
+                self.__untrack(graphKey, nodeId)
+
+    def __refresh(self):
+        pending, self.__pending = self.__pending, {}
+
+        byGraph = OrderedDict() # getGraphKey: LiveNodes to write
+        for commentKey, changedKeys in pending.items():
+            liveNode = self.__tracked.get(commentKey[:2], {}).get(commentKey[2])
+            if liveNode is not None:
+                liveNode.update(liveNode.modifNode_dict, changedKeys)
+                byGraph.setdefault(commentKey[:2], []).append(liveNode)
+
+        for liveNodes in byGraph.values():
+            self.__write(liveNodes[0].graph, liveNodes)
+
+    # Comments whose text changed, written like a batch: placed together and as a single undo step
+    def __write(self, graph, liveNodes):
+        texts = []
+        for liveNode in liveNodes:
+            text = liveNode.getText()
+            if text != liveNode.text:
+                liveNode.text = text
+                texts.append((liveNode, text))
+
+        if not texts:
+            return
+
+        try:
+            writeCommentTexts([(liveNode.node, text) for liveNode, text in texts], graph)
+            return
+        except:
+            pass
+
+        # Some node went away meanwhile: write one by one, and stop tracking the ones that fail
+        for liveNode, text in texts:
+            try:
+                writeComment(liveNode.node, text, graph)
+            except:
+                self.__untrack(getGraphKey(graph), liveNode.node.getIdentifier())
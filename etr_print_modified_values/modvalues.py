@@ -0,0 +1,622 @@
+# python
+#
+# etr_print_modified_values - Modified values extraction
+#
+# Everything needed to compare a node against a Reference node with default values, shared by the single node
+# and the batch (multi selection) paths of the toolbar. Console tools (graph diff, duplicates, database) import
+# their modules when called, so the first click doesn't pay for them.
+
+
+import sd
+
+from contextlib import nullcontext
+from collections import OrderedDict
+
+from sd.api.sdbasetypes import float2
+from sd.api.sdproperty import SDPropertyCategory
+from sd.api.sdvalueserializer import SDValueSerializer
+from sd.api.sdgraphobjectcomment import SDGraphObjectComment
+from sd.ui.graphgrid import GraphGrid
+
+try:
+    from sd.api.sdhistoryutils import SDHistoryUtils
+except ImportError: # Designer versions without undo groups, every Comment is then its own undo step
+    SDHistoryUtils = None
+
+from . import trace
+from .depth import DepthResolver, getNodeLabel
+from .formatters import readValue
+from .layout import placeComments
+from .refcache import ReferenceCache, getReferenceCache, flushReferenceCache
+from .refpool import getReferencePool
+from .report import (supportAtomic, unsupportInstances, dualNodes, nonSupported, betterLabel, grayValue,
+                     getDifferentValues, getModifiedNatives, formatDifferentValues)
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- DEFINE SOME VARIABLES, DICTIONARIES AND LISTS ---------------------------------------------------------
+#
+
+# Create a list of each property category enumeration item
+categories = [
+    SDPropertyCategory.Annotation,
+    SDPropertyCategory.Input
+]
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ------------ START SUB FUNCTION - GET NODE PROPERTES ( LABELS & VALUES ) -----------------------------------------
+#
+
+# Function to get all Properties and Values from a Node as an Ordered Dictionary
+def getNodePropValues(node, nodeLabel, nodeDepth=None):
+
+    # Define an internal Ordered Dictionary for function
+    node_dict = OrderedDict()
+
+    # Per property stages, timed only when tracing (otherwise these are the plain functions)
+    getPropertyValue = trace.timed('getPropertyValue', node.getPropertyValue)
+    read = trace.timed('readValue', readValue)
+    serialize = trace.timed('sToString', SDValueSerializer.sToString)
+
+    # Get node properties for each property category
+    for category in categories:
+        properties = node.getProperties(category)
+
+        # Get the label and identifier of each property
+        for prop in properties:
+            propLabel = prop.getLabel()
+
+            # Get the value for the currently accessed property
+            value = getPropertyValue(prop)
+
+            if value:
+                # Native values through the reader of each SDValue class, see formatters.py. Only unknown classes
+                # (ie textures) are serialized to string. Values stay native (ie SDValueFloat2 float2(0.17365,0.3249)
+                # gives (0.17365, 0.3249)) and are only formatted later, if they differ from the Reference
+                value = read(value, serialize)
+
+                # Special case for 'Dual Nodes' (ie LEVELS) acting as Grayscale
+                value = grayValue(nodeLabel, nodeDepth, propLabel, value)
+
+                # Special cases to give a better/short readability
+                propLabel = betterLabel(propLabel)
+
+                # Add our label/value combos to dictionary
+                node_dict.update({propLabel: value}) # Add our label/value combos to dictionaries
+
+    return node_dict
+
+#
+# ------------ END SUB FUNCTION - GET NODE PROPERTES ( LABELS & VALUES ) -------------------------------------------
+#
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Discern if node is acting as Grayscale or Color. Only relevant for 'Dual Nodes', None for the rest. Grayscale when
+# it can't be known (ie nothing connected). Runs over several nodes share a 'depths' resolver, see depth.py
+def getNodeDepth(node, nodeLabel, depths=None):
+    if nodeLabel not in dualNodes:
+        return None
+
+    if depths is None:
+        depths = DepthResolver()
+
+    return depths.getInputDepth(node) or 'gray'
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Key identifying which Reference node a node must be compared with. Nodes sharing a key share their Reference,
+# so a batch only needs to build it once. None for non supported nodes
+def getReferenceGroup(node, nodeLabel, nodeDepth):
+    if nodeLabel is None:
+        return None
+
+    # Identify if node is Atomic or Instance, and also 'Referenced Graph' & 'From Package' if Instance
+    refRsc = node.getReferencedResource()
+
+    if refRsc:
+        if nodeLabel in unsupportInstances:
+            return None
+        return ('instance', refRsc.getPackage().getFilePath(), refRsc.getIdentifier(), nodeDepth)
+
+    if nodeLabel in supportAtomic:
+        return ('atomic', node.getDefinition().getId(), nodeDepth)
+
+    return None
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Atomic definitions by id, built once (lazily) from the 'sbs::compositing' module
+
+_atomicDefinitions = None
+
+def getAtomicDefinition(definitionId):
+    global _atomicDefinitions
+
+    if _atomicDefinitions is None:
+        modMgr = sd.getContext().getSDApplication().getModuleMgr()
+        atomic_nodes_module = modMgr.getModuleFromId("sbs::compositing")
+        _atomicDefinitions = dict((item.getId(), item) for item in atomic_nodes_module.getDefinitions())
+
+    return _atomicDefinitions.get(definitionId)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Reference values read straight from the node definition: no node created, no graph edited, nothing in the undo
+# stack. None when some Input default can't be known this way, then a real Reference node is needed.
+# Annotations (free text filled by the user) have no default in definitions, a new node has them empty
+def getDefinitionDefaults(definition, nodeLabel, nodeDepth):
+    if definition is None:
+        return None
+
+    node_dict = OrderedDict()
+
+    try:
+        for category in categories:
+            for prop in definition.getProperties(category):
+                value = prop.getDefaultValue()
+
+                if value is None:
+                    # Connectable inputs (images) have no value, getNodePropValues skips them too
+                    if prop.isConnectable():
+                        continue
+                    if category == SDPropertyCategory.Input:
+                        return None
+                    value = ''
+                else:
+                    value = readValue(value, SDValueSerializer.sToString)
+                    value = grayValue(nodeLabel, nodeDepth, prop.getLabel(), value)
+
+                node_dict.update({betterLabel(prop.getLabel()): value})
+    except:
+        return None
+
+    return node_dict
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Read a Reference node, built with 'create(graph)'. Reference nodes live in the scratch graph of the pool and are
+# recycled. If there is no scratch graph, a temporary node is created in the user's 'graph' and deleted once read,
+# or nothing is read when no 'graph' is given (ie prefetch)
+def readReferenceNode(referenceGroup, packFilePath, create, graph, nodeLabel, nodeDepth):
+    pool = getReferencePool()
+
+    if pool.getScratchGraph() is not None:
+        referNode = pool.getReferenceNode(referenceGroup[:-1], packFilePath, create) # Same node for any depth
+        if referNode is None:
+            return None
+        with trace.span('readReferenceNode'):
+            return getNodePropValues(referNode, nodeLabel, nodeDepth)
+
+    if graph is None:
+        return None
+
+    referNode = create(graph)
+    if referNode is None:
+        return None
+
+    try:
+        with trace.span('readReferenceNode'):
+            return getNodePropValues(referNode, nodeLabel, nodeDepth)
+    finally:
+        graph.deleteNode(referNode) # Delete that Reference Node, once we got the needed info (already in our dict)
+
+
+# Reference node creation, timed as its own stage
+def newInstanceNode(targetGraph, resource):
+    with trace.span('newInstanceNode'):
+        return targetGraph.newInstanceNode(resource)
+
+def newNode(targetGraph, definitionId):
+    with trace.span('newNode'):
+        return targetGraph.newNode(definitionId)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Get the Ordered Dictionary for the Reference of a group. Comes from the cache when possible, then from the node
+# 'definition' defaults, and only if that is not enough from a Reference node of the pool. None if it can't be built
+def getReferenceValues(referenceGroup, nodeLabel, graph, definition=None):
+    refCache = getReferenceCache()
+    pool = getReferencePool()
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Load and Identify procedure for INSTANCE NODES
+    if referenceGroup[0] == 'instance':
+        _, pack_file_path, graph_instance, nodeDepth = referenceGroup
+
+        # Reference values are cached, so a warm click skips package loading and node creation entirely
+        cacheKey = ReferenceCache.instanceKey(pack_file_path, graph_instance, nodeDepth)
+        referNode_dict = refCache.get(cacheKey)
+
+        if referNode_dict is None:
+            with trace.span('getDefinitionDefaults'):
+                referNode_dict = getDefinitionDefaults(definition, nodeLabel, nodeDepth)
+            if referNode_dict is not None:
+                refCache.put(cacheKey, referNode_dict)
+                return referNode_dict
+
+            # The pool keeps the package loaded for a while, so nodes from the same library package don't load it again
+            package = pool.acquirePackage(pack_file_path)
+            try:
+                resource = package.findResourceFromUrl('%s' % graph_instance)
+                if not resource:
+                    return None
+
+                # Get Ordered Dictionary for Reference Instance Node
+                referNode_dict = readReferenceNode(referenceGroup, pack_file_path,
+                                                   lambda targetGraph: newInstanceNode(targetGraph, resource),
+                                                   graph, nodeLabel, nodeDepth)
+            finally:
+                pool.releasePackage(pack_file_path)
+
+            if referNode_dict is not None:
+                refCache.put(cacheKey, referNode_dict)
+
+        return referNode_dict
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Load and Identify procedure for ATOMIC NODES
+    _, definitionId, nodeDepth = referenceGroup
+
+    # Atomic defaults only depend on the definition, so they are cached by definition id
+    cacheKey = ReferenceCache.atomicKey(definitionId, nodeDepth)
+    referNode_dict = refCache.get(cacheKey)
+
+    if referNode_dict is None:
+        with trace.span('getDefinitionDefaults'):
+            referNode_dict = getDefinitionDefaults(definition or getAtomicDefinition(definitionId), nodeLabel, nodeDepth)
+
+        # Get Ordered Dictionary for Reference Atomic Node, only when the definition wasn't enough
+        if referNode_dict is None:
+            referNode_dict = readReferenceNode(referenceGroup, None,
+                                               lambda targetGraph: newNode(targetGraph, definitionId),
+                                               graph, nodeLabel, nodeDepth)
+
+        if referNode_dict is not None:
+            refCache.put(cacheKey, referNode_dict)
+
+    return referNode_dict
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Get the Modified and Reference Ordered Dictionaries of a single node, None for non supported nodes. 'references'
+# maps Reference groups to their Ordered Dictionaries and is shared by all the nodes of a run, so every Reference is
+# built and read only once per definition. 'depths' resolves Grayscale/Color, also shared by all the nodes of a run
+def getNodeValues(node, graph, references, depths=None):
+    nodeLabel = getNodeLabel(node)
+    nodeDepth = getNodeDepth(node, nodeLabel, depths)
+    referenceGroup = getReferenceGroup(node, nodeLabel, nodeDepth)
+
+    if referenceGroup is None:
+        return None
+
+    # A Reference that can't be built (ie its package fails to load) is remembered as None, not tried for every node
+    trace.hit('references', referenceGroup in references)
+    if referenceGroup not in references:
+        references[referenceGroup] = None
+        with trace.span('getReferenceValues'):
+            try:
+                references[referenceGroup] = getReferenceValues(referenceGroup, nodeLabel, graph, node.getDefinition())
+            except Exception as error:
+                print(f'Could not read the Reference of {nodeLabel}: {error}')
+
+    referNode_dict = references[referenceGroup]
+    if referNode_dict is None:
+        return None
+
+    try:
+        with trace.span('getNodePropValues'):
+            modifNode_dict = getNodePropValues(node, nodeLabel, nodeDepth)
+    except:
+        return None
+
+    return nodeLabel, nodeDepth, modifNode_dict, referNode_dict
+
+
+# Get the different values of a single node. A node that can't be read is not supported, it doesn't stop a batch.
+# With 'natives', also the plain values behind them, as (different_dict, modified_dict)
+def getNodeModifiedValues(node, graph, references, depths=None, natives=False):
+    try:
+        nodeValues = getNodeValues(node, graph, references, depths)
+    except Exception as error:
+        print(f'Could not read node {node.getIdentifier()}: {error}')
+        nodeValues = None
+
+    if nodeValues is None:
+        return (nonSupported, OrderedDict()) if natives else nonSupported
+
+    _, _, modifNode_dict, referNode_dict = nodeValues
+    with trace.span('getDifferentValues'):
+        different_dict = getDifferentValues(modifNode_dict, referNode_dict)
+
+    if natives:
+        return different_dict, getModifiedNatives(different_dict, modifNode_dict)
+    return different_dict
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Get the different values of a list of nodes, as a list of (node, different_dict). With 'natives', as a list of
+# (node, (different_dict, modified_dict))
+def getModifiedValues(nodes, graph, references=None, depths=None, natives=False):
+    if references is None:
+        references = {}
+    if depths is None:
+        depths = DepthResolver()
+
+    results = [(node, getNodeModifiedValues(node, graph, references, depths, natives)) for node in nodes]
+    flushReferenceCache() # New References go to disk once per batch
+    return results
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Definition of a node as a plain string: atomic definition id, or package file path and graph for Instances
+def getDefinitionKey(node):
+    try:
+        refRsc = node.getReferencedResource()
+        if refRsc:
+            return '%s/%s' % (refRsc.getPackage().getFilePath(), refRsc.getIdentifier())
+        return node.getDefinition().getId()
+    except:
+        return None
+
+
+# Records of every node of a graph for graphdiff.py, with all their values (not only the modified ones)
+def getGraphRecords(graph, depths=None):
+    from .graphdiff import NodeRecord
+
+    if depths is None:
+        depths = DepthResolver()
+
+    records = []
+    nodes = graph.getNodes()
+
+    for node in [nodes.getItem(i) for i in range(nodes.getSize())]:
+        nodeLabel = getNodeLabel(node)
+        try:
+            values = getNodePropValues(node, nodeLabel, getNodeDepth(node, nodeLabel, depths))
+            position = node.getPosition()
+            position = (position.x, position.y)
+        except:
+            values = OrderedDict()
+            position = None
+
+        records.append(NodeRecord(node.getIdentifier(), getDefinitionKey(node), nodeLabel, position, values))
+
+    return records
+
+
+# Node by node diff of two graphs (ie two versions of a graph open side by side). From Designer's Python console:
+#   from etr_print_modified_values.modvalues import diffGraphs
+#   diffGraphs(oldGraph, newGraph)
+def diffGraphs(oldGraph, newGraph, verbose=True):
+    from .graphdiff import diffNodes, formatGraphDiff
+
+    graphDiff = diffNodes(getGraphRecords(oldGraph), getGraphRecords(newGraph))
+    if verbose:
+        print(formatGraphDiff(graphDiff))
+    return graphDiff
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# What is connected to a node, as a tuple of (input identifier, upstream node identifier, upstream output identifier)
+def getNodeUpstream(node):
+    upstream = []
+    try:
+        for prop in node.getProperties(SDPropertyCategory.Input):
+            if not prop.isConnectable():
+                continue
+            connections = node.getPropertyConnections(prop)
+            for i in range(connections.getSize() if connections else 0):
+                conn = connections.getItem(i)
+                upstream.append((prop.getId(), conn.getInputPropertyNode().getIdentifier(),
+                                 conn.getInputProperty().getId()))
+    except:
+        pass
+    return tuple(upstream)
+
+
+# Groups of identical nodes of a graph (same definition, same modified values, same inputs), candidates for merging.
+# Modified values come from the same pass as the Comments, so References are shared as usual. From Designer's
+# Python console:
+#   from etr_print_modified_values.modvalues import findGraphDuplicates
+#   findGraphDuplicates(graph)
+def findGraphDuplicates(graph, verbose=True):
+    from .duplicates import HashNode, findDuplicates, formatDuplicates
+
+    nodes = graph.getNodes()
+    nodes = [nodes.getItem(i) for i in range(nodes.getSize())]
+
+    hashNodes = []
+    for node, different_dict in getModifiedValues(nodes, graph):
+        hashNodes.append(HashNode(node.getIdentifier(), getDefinitionKey(node), getNodeLabel(node), different_dict,
+                                  getNodeUpstream(node)))
+
+    groups = findDuplicates(hashNodes)
+    if verbose:
+        print(formatDuplicates(groups))
+    return groups
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Store the modified values of every node of a graph in a SQLite database (see valuedb.py), replacing what was stored
+# for this graph before. From Designer's Python console:
+#   from etr_print_modified_values.modvalues import indexGraph
+#   indexGraph(graph, 'D:/values.sqlite')
+def indexGraph(graph, dbPath):
+    from .valuedb import ValueDatabase, getRows
+
+    nodes = graph.getNodes()
+    nodes = [nodes.getItem(i) for i in range(nodes.getSize())]
+
+    try:
+        packagePath = graph.getPackage().getFilePath() or '' # Unsaved package
+    except:
+        packagePath = ''
+    graphName = graph.getIdentifier()
+
+    rows = []
+    for node, (different_dict, modified_dict) in getModifiedValues(nodes, graph, natives=True):
+        rows.extend(getRows(packagePath, graphName, node.getIdentifier(), getDefinitionKey(node), getNodeLabel(node),
+                            different_dict, modified_dict))
+
+    with ValueDatabase(dbPath) as db:
+        db.replaceGraphs([(packagePath, graphName)], rows)
+    return len(rows)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Several edits of the graph as a single undo step
+def undoGroup(name):
+    if SDHistoryUtils is None:
+        return nullcontext()
+    return SDHistoryUtils.UndoGroup(name)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Comments created by the plugin, by getCommentKey. Running again on a node updates its Comment instead of stacking
+# a new one, and the description is only rewritten when the text really changes
+ownedComments = {}
+
+# Node identifiers are only unique inside a graph ("1" is in every graph), so owned Comments are keyed by package
+# file path and graph identifier too
+def getGraphKey(graph):
+    packagePath = graphId = None
+    if graph is not None:
+        try:
+            graphId = graph.getIdentifier()
+            packagePath = graph.getPackage().getFilePath()
+        except:
+            pass
+    return (packagePath, graphId)
+
+def getCommentKey(graph, node):
+    return getGraphKey(graph) + (node.getIdentifier(),)
+
+def writeComment(node, differ_str, graph, offset=None):
+    commentKey = getCommentKey(graph, node)
+    sdGraphObjectComment = ownedComments.get(commentKey)
+
+    if sdGraphObjectComment is not None:
+        try:
+            if sdGraphObjectComment.getDescription() != differ_str:
+                with trace.span('setDescription'):
+                    sdGraphObjectComment.setDescription('%s' % differ_str)
+            return sdGraphObjectComment
+        except:
+            pass # Comment deleted by the user meanwhile, create a new one
+
+    if offset is None:
+        gridSize = GraphGrid.sGetFirstLevelSize()
+        offset = (-gridSize*0.5, gridSize*0.5)
+
+    with trace.span('sNewAsChild'):
+        sdGraphObjectComment = SDGraphObjectComment.sNewAsChild(node)
+        sdGraphObjectComment.setPosition(float2(*offset))
+        sdGraphObjectComment.setDescription('%s' % differ_str)
+
+    ownedComments[commentKey] = sdGraphObjectComment
+    return sdGraphObjectComment
+
+
+def getPositionTuple(sdObject):
+    position = sdObject.getPosition()
+    return (position.x, position.y)
+
+
+# Comments of the 'graph' not written by the plugin (ie the user's own), as (node position, offset, text). Child
+# Comments are placed relative to their node, free Comments are placed in the graph. 'owned' are the positions of
+# the Comments of the plugin, by node identifier: those are already taken into account with their new text
+def getGraphComments(graph, owned):
+    try:
+        graphObjects = graph.getGraphObjects()
+        graphObjects = [graphObjects.getItem(i) for i in range(graphObjects.getSize())]
+    except:
+        return [] # Designer versions without graph objects
+
+    comments = []
+    for graphObject in graphObjects:
+        if not isinstance(graphObject, SDGraphObjectComment):
+            continue
+
+        try:
+            position = getPositionTuple(graphObject)
+            text = graphObject.getDescription()
+            parent = graphObject.getParent()
+            if parent is None:
+                comments.append(((0.0, 0.0), position, text))
+                continue
+
+            parentId = parent.getIdentifier()
+            if owned.get(parentId) == position:
+                continue
+            comments.append((getPositionTuple(parent), position, text))
+        except:
+            pass
+
+    return comments
+
+
+# Offsets of the new Comments of a batch, as {node identifier: offset}, so they overlap no node of the 'graph' nor
+# any Comment, ours or not (see layout.py). Comments already written keep their place
+def getCommentOffsets(texts, graph=None):
+    if graph is not None:
+        graphNodes = graph.getNodes()
+        graphNodes = [graphNodes.getItem(i) for i in range(graphNodes.getSize())]
+    else:
+        graphNodes = [node for node, _ in texts]
+
+    newTexts = dict((node.getIdentifier(), differ_str) for node, differ_str in texts)
+    nodes = []
+    comments = []
+    owned = {}
+    new = []
+
+    for node in graphNodes:
+        try:
+            nodeId = node.getIdentifier()
+            position = getPositionTuple(node)
+        except:
+            continue
+        nodes.append((nodeId, position))
+
+        sdGraphObjectComment = ownedComments.get(getCommentKey(graph, node))
+        if sdGraphObjectComment is not None:
+            try:
+                text = newTexts.get(nodeId) or sdGraphObjectComment.getDescription()
+                owned[nodeId] = getPositionTuple(sdGraphObjectComment)
+                comments.append((position, owned[nodeId], text))
+            except:
+                pass # Deleted by the user meanwhile
+        elif nodeId in newTexts:
+            new.append((nodeId, position, newTexts[nodeId]))
+
+    if graph is not None:
+        comments += getGraphComments(graph, owned)
+
+    return placeComments(GraphGrid.sGetFirstLevelSize(), nodes, comments, new)
+
+
+# Write the Comments of a batch of (node, text), placed together and as a single undo step
+def writeCommentTexts(texts, graph=None):
+    with undoGroup('Print Modified Values'):
+        with trace.span('placeComments'):
+            offsets = getCommentOffsets(texts, graph)
+
+        for node, differ_str in texts:
+            writeComment(node, differ_str, graph, offsets.get(node.getIdentifier()))
+
+
+# Create New Comments attached to Nodes with our info, all of them in a single pass and a single undo step. Pass the
+# 'graph' so new Comments also avoid the nodes not annotated
+def writeComments(results, graph=None):
+    with trace.span('writeComments'):
+        texts = []
+        for node, different_dict in results:
+            differ_str = formatDifferentValues(different_dict)
+            print(f'Different Values : {differ_str}')
+            texts.append((node, differ_str))
+
+        writeCommentTexts(texts, graph)
@@ -0,0 +1,272 @@
+# python
+#
+# etr_print_modified_values - Designer plugin: toolbar and callbacks
+#
+# Adapted from factory plugin 'node_align_tools'. Only imported inside Designer, see __init__.py
+
+
+# Import the required classes, tools and other sd stuff. Only what the toolbar itself needs: this module is imported
+# when Designer starts, the rest (modvalues, audit, live mode...) is imported on first use
+import os
+import sd
+import weakref
+
+from functools import partial
+
+from PySide2 import QtCore, QtGui, QtWidgets, QtSvg
+
+from . import trace
+
+
+DEFAULT_ICON_SIZE = 24
+
+# Prefetch References of every graph opened, see prefetch.py. Off by default, enable it with ETR_PMV_PREFETCH=1
+prefetchEnabled = os.environ.get('ETR_PMV_PREFETCH', '') not in ('', '0')
+
+
+def getDevicePixelRatio():
+    app = QtGui.QGuiApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+
+# Rendered icons by (name, size, device pixel ratio). Every graph view opened shows the same icons, they are only
+# rendered once per session
+_icons = {}
+
+def loadSvgIcon(iconName, size):
+    key = (iconName, size, getDevicePixelRatio())
+    if key not in _icons:
+        _icons[key] = renderSvgIcon(*key)
+    return _icons[key]
+
+# Adapted from factory plugin 'node_align_tools', rendered at the device pixel ratio so icons stay sharp on HiDPI
+def renderSvgIcon(iconName, size, devicePixelRatio):
+    currentDir = os.path.dirname(__file__)
+    iconFile = os.path.abspath(os.path.join(currentDir, iconName + '.svg'))
+
+    svgRenderer = QtSvg.QSvgRenderer(iconFile)
+    if svgRenderer.isValid():
+        pixelSize = int(round(size * devicePixelRatio))
+        pixmap = QtGui.QPixmap(QtCore.QSize(pixelSize, pixelSize))
+
+        if not pixmap.isNull():
+            pixmap.fill(QtCore.Qt.transparent)
+            painter = QtGui.QPainter(pixmap)
+            svgRenderer.render(painter)
+            painter.end()
+            pixmap.setDevicePixelRatio(devicePixelRatio)
+
+        return QtGui.QIcon(pixmap)
+
+    return None
+
+# Adapted from factory plugin 'node_align_tools'
+class PrintModValuesToolBar(QtWidgets.QToolBar):
+    __toolbarList = {}
+
+    def __init__(self, graphViewID, uiMgr):
+        super(PrintModValuesToolBar, self).__init__(parent=uiMgr.getMainWindow())
+
+        self.setObjectName("etereaestudios.com.print_modvalues_toolbar")
+
+        self.__graphViewID = graphViewID
+        self.__uiMgr = uiMgr
+
+        act = self.addAction(loadSvgIcon("print_modified_values_a", DEFAULT_ICON_SIZE), "PMVa")
+        act.setShortcut(QtGui.QKeySequence('Q'))
+        act.setToolTip(self.tr("Print Modified Values"))
+        act.triggered.connect(self.__onPrintModValues)
+
+        act = self.addAction(loadSvgIcon("print_modified_values", DEFAULT_ICON_SIZE), "PMVg")
+        act.setShortcut(QtGui.QKeySequence('Shift+Q'))
+        act.setToolTip(self.tr("Audit Entire Graph (Print Modified Values of every node)"))
+        act.triggered.connect(self.__onAuditGraph)
+        self.__audit = None
+
+        act = self.addAction(loadSvgIcon("print_modified_values_live", DEFAULT_ICON_SIZE), "PMVl")
+        act.setCheckable(True)
+        act.setShortcut(QtGui.QKeySequence('Alt+Q'))
+        act.setToolTip(self.tr("Live Mode (keep Comments of annotated nodes up to date)"))
+        act.toggled.connect(self.__onLiveModeToggled)
+        self.__liveAnnotator = None # Created on first use, like everything not needed to show the toolbar
+        self.__prefetcher = None
+
+        self.__toolbarList[graphViewID] = weakref.ref(self)
+        self.destroyed.connect(partial(PrintModValuesToolBar.__onToolbarDeleted, graphViewID=graphViewID))
+
+    def tooltip(self):
+        return self.tr("Print Modified Values")
+
+    # ////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+    # ////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+    #
+    #
+    #
+    # ------------ START MAIN FUNCTION ------------------------------------------------------------------------------
+    #
+    #
+    #
+
+    def __onPrintModValues(self):
+
+        # Get the current graph and the currently selected nodes
+        graph = self.__uiMgr.getCurrentGraph()
+        selection = self.__uiMgr.getCurrentGraphSelectedNodes()
+        nodes = [selection.getItem(i) for i in range(selection.getSize())]
+
+        if not nodes:
+            print('Select at least 1 node')
+            return
+
+        # Live mode: annotated nodes are also tracked, so their Comments follow later edits
+        if self.__liveAnnotator is not None and self.__liveAnnotator.isActive():
+            from .refcache import flushReferenceCache
+
+            with trace.span('liveTrack'):
+                self.__liveAnnotator.track(nodes, graph)
+            flushReferenceCache()
+            return
+
+        from .modvalues import getModifiedValues, writeComments
+
+        # Batch mode: the whole selection is processed at once, building each Reference only once per definition
+        with trace.span('getModifiedValues'):
+            results = getModifiedValues(nodes, graph)
+        writeComments(results, graph)
+
+    # Live mode on: annotate and track the selected nodes. Off: stop tracking (Comments stay as they are)
+    def __onLiveModeToggled(self, checked):
+        if not checked:
+            if self.__liveAnnotator is not None:
+                self.__liveAnnotator.stop()
+            return
+
+        if self.__liveAnnotator is None:
+            from .livemode import LiveAnnotator
+            self.__liveAnnotator = LiveAnnotator(self.__uiMgr, self)
+
+        self.__liveAnnotator.start()
+        self.__onPrintModValues()
+
+    # Fill the reference cache with the References of a graph while Designer is idle, see prefetch.py
+    def startPrefetch(self, graph):
+        from .prefetch import ReferencePrefetcher
+
+        if self.__prefetcher is not None:
+            self.__prefetcher.stop()
+
+        self.__prefetcher = ReferencePrefetcher(graph, parent=self)
+        self.destroyed.connect(self.__prefetcher.stop)
+        self.__prefetcher.start()
+
+    # Annotate every node of the current graph, in small slices so Designer stays responsive. Cancellable
+    def __onAuditGraph(self):
+        if self.__audit is not None and self.__audit.isRunning():
+            print('A graph audit is already running')
+            return
+
+        graph = self.__uiMgr.getCurrentGraph()
+        if not graph:
+            return
+
+        from .audit import GraphAudit
+
+        self.__audit = GraphAudit(graph, parent=self.__uiMgr.getMainWindow())
+        self.__audit.start()
+
+    #
+    # ------------ END MAIN FUNCTION -----------------------------------------------------------------------------
+    #
+    #
+    #
+    # ////////////////////////////////////////////////////////////////////////////////////////////////////////////
+    # ////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+
+    # Literally copied from factory plugin 'node_align_tools'
+    @classmethod
+    def __onToolbarDeleted(cls, graphViewID):
+        del cls.__toolbarList[graphViewID]
+
+    # Literally copied from factory plugin 'node_align_tools'
+    @classmethod 
+    def removeAllToolbars(cls):
+        for toolbar in cls.__toolbarList.values():
+            if toolbar():
+                toolbar().deleteLater()
+
+# Adapted from factory plugin 'node_align_tools'
+def onNewGraphViewCreated(graphViewID, uiMgr):
+    # Ignore graph types not supported by the Python API.
+    if not uiMgr.getCurrentGraph():
+        return
+
+    # Timed (ETR_PMV_TRACE=1) as it delays every graph tab opening
+    with trace.span('onNewGraphViewCreated'):
+        toolbar = PrintModValuesToolBar(graphViewID, uiMgr)
+        uiMgr.addToolbarToGraphView(
+            graphViewID,
+            toolbar,
+            icon = loadSvgIcon("print_modified_values", DEFAULT_ICON_SIZE),
+            tooltip = toolbar.tooltip())
+
+    # Optional (ETR_PMV_PREFETCH=1): the first 'Q' on any node of this graph is then a reference cache hit
+    if prefetchEnabled:
+        toolbar.startPrefetch(uiMgr.getCurrentGraph())
+
+
+graphViewCreatedCallbackID = 0
+
+# Adapted from factory plugin 'node_align_tools'
+def initializeSDPlugin():
+
+    # Get the application and UI manager object.
+    with trace.span('initializeSDPlugin'):
+        ctx = sd.getContext()
+        app = ctx.getSDApplication()
+        uiMgr = app.getQtForPythonUIMgr()
+
+        if uiMgr:
+            global graphViewCreatedCallbackID
+            graphViewCreatedCallbackID = uiMgr.registerGraphViewCreatedCallback(
+                partial(onNewGraphViewCreated, uiMgr=uiMgr))
+
+
+# Adapted from factory plugin 'node_align_tools'
+def uninitializeSDPlugin():
+    ctx = sd.getContext()
+    app = ctx.getSDApplication()
+    uiMgr = app.getQtForPythonUIMgr()
+
+    if uiMgr:
+        global graphViewCreatedCallbackID
+        uiMgr.unregisterCallback(graphViewCreatedCallbackID)
+        PrintModValuesToolBar.removeAllToolbars()
+
+    # Save the References found since the last flush, then unload the scratch graph and the library packages kept
+    # loaded for Reference nodes
+    from .refcache import flushReferenceCache
+    from .refpool import shutdownReferencePool
+    flushReferenceCache()
+    shutdownReferencePool()
+
+    if trace.enabled:
+        exportTrace()
+
+
+# Timings of the whole session, when tracing is on (ETR_PMV_TRACE=1). Next to the reference cache
+def exportTrace(traceDir=None):
+    from .refcache import getDefaultCacheDir
+
+    traceDir = traceDir or getDefaultCacheDir()
+    try:
+        os.makedirs(traceDir, exist_ok=True)
+        trace.exportJsonLines(os.path.join(traceDir, 'trace.jsonl'))
+        trace.exportChromeTrace(os.path.join(traceDir, 'trace.json'))
+    except OSError as e:
+        print(f'Could not export trace: {e}')
+        return
+
+    print(trace.formatSummary())
+    print(f'Trace exported to {traceDir}')
+
@@ -0,0 +1,158 @@
+# python
+#
+# etr_print_modified_values - Idle time prefetch of Reference defaults
+#
+# The first 'Q' on a node of a library package pays for loading that package and reading its Reference. When a graph
+# opens, the distinct definitions and referenced resources of its nodes are already known, so their Reference values
+# can be put in the reference cache before anyone asks, while Designer has nothing else to do:
+#
+#   - Work runs in small slices on the Qt event loop (like the graph audit), one node or one Reference at a time
+#   - Any mouse, key or wheel input pauses it, and it only resumes after RESUME_DELAY without input
+#   - It stops once the values it added reach a memory budget, or when the graph has been walked entirely
+#
+# Off by default, enable it with the environment variable ETR_PMV_PREFETCH=1 (budget in MB: ETR_PMV_PREFETCH_BUDGET),
+# see plugin.onNewGraphViewCreated
+
+
+import os
+import sys
+import time
+
+from PySide2 import QtCore
+
+from . import trace
+from .depth import DepthResolver
+from .refcache import flushReferenceCache
+from .modvalues import getNodeLabel, getNodeDepth, getReferenceGroup, getReferenceValues
+
+
+DEFAULT_BUDGET_MB = 16
+SLICE_DURATION = 0.01 # Seconds of work per event loop slice, smaller than the audit's: nobody asked for this work
+RESUME_DELAY = 1.5 # Seconds without user input before resuming
+
+inputEvents = (
+    QtCore.QEvent.MouseButtonPress,
+    QtCore.QEvent.MouseButtonDblClick,
+    QtCore.QEvent.KeyPress,
+    QtCore.QEvent.Wheel,
+)
+
+
+def getBudget():
+    try:
+        return int(float(os.environ.get('ETR_PMV_PREFETCH_BUDGET', DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+# Rough memory taken by a Reference Ordered Dictionary, enough to keep the prefetch within its budget
+def getValuesSize(values_dict):
+    size = sys.getsizeof(values_dict)
+    for label, value in values_dict.items():
+        size += sys.getsizeof(label) + sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+class ReferencePrefetcher(QtCore.QObject):
+
+    finished = QtCore.Signal()
+
+    def __init__(self, graph, budget=None, parent=None):
+        super(ReferencePrefetcher, self).__init__(parent)
+
+        self.__graph = graph
+        self.__budget = getBudget() if budget is None else budget
+        self.__nodes = []
+        self.__index = 0
+        self.__groups = set() # Reference groups already seen, each one is fetched once
+        self.__depths = DepthResolver()
+        self.__lastInput = None # time.monotonic() of the last user input
+        self.__running = False
+
+        self.used = 0 # Estimated bytes of the Reference values fetched
+        self.fetched = 0
+
+    def start(self):
+        nodes = self.__graph.getNodes()
+        self.__nodes = [nodes.getItem(i) for i in range(nodes.getSize())]
+        self.__index = 0
+        self.__running = True
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.installEventFilter(self)
+
+        QtCore.QTimer.singleShot(0, self.__processSlice)
+
+    def stop(self):
+        if not self.__running:
+            return
+        self.__running = False
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.removeEventFilter(self)
+
+        flushReferenceCache()
+        self.finished.emit()
+
+    def isRunning(self):
+        return self.__running
+
+    # Any user input pauses the prefetch. Events are only watched, never consumed
+    def eventFilter(self, watched, event):
+        if event.type() in inputEvents:
+            self.__lastInput = time.monotonic()
+        return False
+
+    def __processSlice(self):
+        if not self.__running:
+            return
+
+        idle = RESUME_DELAY if self.__lastInput is None else time.monotonic() - self.__lastInput
+        if idle < RESUME_DELAY:
+            QtCore.QTimer.singleShot(int((RESUME_DELAY - idle) * 1000) + 1, self.__processSlice)
+            return
+
+        sliceEnd = time.perf_counter() + SLICE_DURATION
+
+        with trace.span('prefetchSlice'):
+            while self.__index < len(self.__nodes) and time.perf_counter() < sliceEnd:
+                node = self.__nodes[self.__index]
+                self.__index += 1
+                self.__prefetchNode(node)
+
+                if self.used >= self.__budget:
+                    print(f'Reference prefetch stopped, memory budget reached ({self.fetched} References)')
+                    self.stop()
+                    return
+
+        if self.__index < len(self.__nodes):
+            QtCore.QTimer.singleShot(0, self.__processSlice)
+            return
+
+        self.stop()
+
+    def __prefetchNode(self, node):
+        try:
+            nodeLabel = getNodeLabel(node)
+            referenceGroup = getReferenceGroup(node, nodeLabel, getNodeDepth(node, nodeLabel, self.__depths))
+        except:
+            return
+
+        if referenceGroup is None or referenceGroup in self.__groups:
+            return
+        self.__groups.add(referenceGroup)
+
+        # No user graph given: Reference nodes are only built in the scratch graph (created by the pool only when the
+        # definition defaults are not enough), never in the user's graph behind their back
+        try:
+            referNode_dict = getReferenceValues(referenceGroup, nodeLabel, None, node.getDefinition())
+        except:
+            return
+
+        if referNode_dict is not None:
+            self.fetched += 1
+            self.used += getValuesSize(referNode_dict)
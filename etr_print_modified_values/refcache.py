@@ -0,0 +1,207 @@
+# python
+#
+# etr_print_modified_values - Reference defaults cache
+#
+# Building the Reference node is the slowest part of every click: Instance nodes need their package loaded and a
+# temporary node instantiated, Atomic nodes need a temporary node too. But default values never change unless the
+# package file changes, so we keep them in memory (LRU) and also persist them to disk between Designer sessions.
+#
+# Keys are plain strings so they can be stored as JSON:
+#   - Atomic nodes:   definition id (ie 'sbs::compositing::blend')
+#   - Instance nodes: package file path + graph identifier + package mtime/size (so an edited package is a miss)
+#
+# Atomic defaults come with Designer itself, so the file also records the Designer version it was written by, and a
+# file from another version is ignored. New entries are only written to disk on flush(), once per click, audit or
+# prefetch, not on every miss.
+
+
+import os
+import json
+
+from collections import OrderedDict
+
+from . import trace
+from .report import KeyArray, EnumValue
+
+
+CACHE_FORMAT_VERSION = 4 # Bump this whenever the stored values change shape, old files are then ignored
+DEFAULT_MAX_ENTRIES = 512
+CACHE_FILE_NAME = 'reference_defaults.json'
+
+
+def getDefaultCacheDir():
+    return os.environ.get('ETR_PMV_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.etr_print_modified_values')
+
+
+# JSON has no tuples nor KeyArrays: vector values come back as lists, but our diff compares them with tuples.
+# Enumerator names would come back as plain strings
+def encodeValue(value):
+    if isinstance(value, KeyArray):
+        return {'keys': value.toList()}
+    if isinstance(value, EnumValue):
+        return {'enum': str(value)}
+    return value
+
+def decodeValue(value):
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict) and 'keys' in value:
+        return KeyArray(value['keys'])
+    if isinstance(value, dict) and 'enum' in value:
+        return EnumValue(value['enum'])
+    return value
+
+
+class ReferenceCache(object):
+
+    def __init__(self, filePath=None, maxEntries=DEFAULT_MAX_ENTRIES, application=None):
+        self.__filePath = filePath
+        self.__maxEntries = maxEntries
+        self.__application = application
+        self.__entries = OrderedDict()
+        self.__loaded = filePath is None # Nothing to load for a memory-only cache
+        self.__dirty = False
+
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Keys
+
+    @staticmethod
+    def atomicKey(definitionId, nodeDepth=None):
+        return 'atomic|%s|%s' % (definitionId, nodeDepth)
+
+    @staticmethod
+    def instanceKey(packFilePath, graphIdentifier, nodeDepth=None):
+        # Unsaved or missing packages can't be validated against their file, so they are never cached
+        try:
+            stat = os.stat(packFilePath)
+        except (OSError, TypeError, ValueError):
+            return None
+
+        packFilePath = os.path.normcase(os.path.abspath(packFilePath))
+        return 'instance|%s|%s|%d:%d|%s' % (packFilePath, graphIdentifier, stat.st_mtime_ns, stat.st_size, nodeDepth)
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Lookup
+
+    def get(self, key):
+        if key is None:
+            return None
+
+        self.__load()
+
+        values = self.__entries.get(key)
+        trace.hit('referenceCache', values is not None)
+        if values is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return OrderedDict(values) # A copy, so callers can't alter what is cached
+
+    def put(self, key, values):
+        if key is None:
+            return
+
+        self.__load()
+
+        self.__entries[key] = OrderedDict(values)
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.__maxEntries:
+            self.__entries.popitem(last=False)
+
+        self.__dirty = True
+
+    def clear(self):
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.__dirty = True
+        self.flush()
+
+    # Write the entries added since the last flush, if any
+    def flush(self):
+        if not self.__dirty:
+            return
+        self.__dirty = False
+
+        with trace.span('flushReferenceCache'):
+            self.__save()
+
+    def __len__(self):
+        self.__load()
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        self.__load()
+        return key in self.__entries
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Persistence. Any problem with the file just means a cold cache, never a failed click
+
+    def __load(self):
+        if self.__loaded:
+            return
+        self.__loaded = True
+
+        try:
+            with open(self.__filePath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(data, dict) or data.get('version') != CACHE_FORMAT_VERSION:
+            return
+        if data.get('application') != self.__application:
+            return # Written by another Designer version, its Atomic defaults may differ
+
+        for key, pairs in data.get('entries', []):
+            self.__entries[key] = OrderedDict((label, decodeValue(value)) for label, value in pairs)
+
+    def __save(self):
+        if self.__filePath is None:
+            return
+
+        data = {
+            'version': CACHE_FORMAT_VERSION,
+            'application': self.__application,
+            'entries': [[key, [(label, encodeValue(value)) for label, value in values.items()]]
+                        for key, values in self.__entries.items()]
+        }
+
+        tmpPath = self.__filePath + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.__filePath), exist_ok=True)
+            with open(tmpPath, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmpPath, self.__filePath) # Atomic, a crash never leaves a half written cache
+        except OSError as e:
+            print(f'Could not save reference cache: {e}')
+
+
+# Version of the running Designer, None if the API can't tell
+def getApplicationVersion():
+    try:
+        import sd
+        return '%s' % sd.getContext().getSDApplication().getVersion()
+    except:
+        return None
+
+
+# Shared cache for the whole plugin session
+_referenceCache = None
+
+def getReferenceCache():
+    global _referenceCache
+    if _referenceCache is None:
+        _referenceCache = ReferenceCache(os.path.join(getDefaultCacheDir(), CACHE_FILE_NAME),
+                                         application=getApplicationVersion())
+    return _referenceCache
+
+def flushReferenceCache():
+    if _referenceCache is not None:
+        _referenceCache.flush()
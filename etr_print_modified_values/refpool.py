@@ -0,0 +1,187 @@
+# python
+#
+# etr_print_modified_values - Scratch pool for Reference nodes
+#
+# Reference nodes used to be created in the user's own graph (one more edit in the undo stack) and their package
+# loaded and unloaded on every click. Instead, this pool keeps:
+#   - One scratch package/graph, created on first use, where every Reference node is instantiated. The API has no
+#     hidden packages, so it shows in the Explorer as an unsaved package until the plugin is unloaded
+#   - Reference nodes already instantiated there, recycled for later reads (LRU)
+#   - Library packages loaded by us, reference-counted and only unloaded after some idle time or when too many
+#     are loaded (LRU). Packages the user already had open are used as they are, and never unloaded by us
+
+
+import sd
+
+from collections import OrderedDict
+
+from sd.api.sbs.sdsbscompgraph import SDSBSCompGraph
+
+from PySide2 import QtCore
+
+from . import trace
+
+
+SCRATCH_GRAPH_IDENTIFIER = 'etr_print_modified_values_scratch'
+MAX_LOADED_PACKAGES = 8
+MAX_REFERENCE_NODES = 64
+PACKAGE_IDLE_TIMEOUT = 60000 # Milliseconds a package stays loaded once nobody uses it
+
+
+class ReferencePool(object):
+
+    def __init__(self):
+        self.__scratchPackage = None
+        self.__scratchGraph = None
+        self.__packages = OrderedDict() # File path: [package, reference count, owned by us]
+        self.__nodes = OrderedDict() # Reference group without depth: (node, package file path or None)
+
+        self.__idleTimer = QtCore.QTimer()
+        self.__idleTimer.setSingleShot(True)
+        self.__idleTimer.setInterval(PACKAGE_IDLE_TIMEOUT)
+        self.__idleTimer.timeout.connect(self.__unloadIdlePackages)
+
+    def __getPackageMgr(self):
+        return sd.getContext().getSDApplication().getPackageMgr()
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Scratch graph. None if it can't be created, callers then fall back to the user's graph
+
+    def getScratchGraph(self):
+        if self.__scratchGraph is None:
+            try:
+                self.__scratchPackage = self.__getPackageMgr().newUserPackage()
+                self.__scratchGraph = SDSBSCompGraph.sNew(self.__scratchPackage)
+                self.__scratchGraph.setIdentifier(SCRATCH_GRAPH_IDENTIFIER)
+            except:
+                self.__scratchPackage = None
+                self.__scratchGraph = None
+
+        return self.__scratchGraph
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Packages
+
+    def acquirePackage(self, packFilePath):
+        entry = self.__packages.get(packFilePath)
+
+        if entry is None:
+            pkMgr = self.__getPackageMgr()
+
+            # Already open by the user: use it, but it's not ours to unload
+            package = None
+            try:
+                package = pkMgr.getUserPackageFromFilePath(packFilePath)
+            except:
+                pass
+
+            if package is not None:
+                entry = [package, 0, False]
+            else:
+                with trace.span('loadUserPackage'):
+                    entry = [pkMgr.loadUserPackage(packFilePath), 0, True]
+
+            self.__packages[packFilePath] = entry
+
+        entry[1] += 1
+        self.__packages.move_to_end(packFilePath)
+        return entry[0]
+
+    def releasePackage(self, packFilePath):
+        entry = self.__packages.get(packFilePath)
+        if entry is None:
+            return
+
+        entry[1] = max(0, entry[1] - 1)
+
+        # Too many packages loaded: unload the least recently used ones nobody is using right now
+        for path in [p for p, e in self.__packages.items() if e[1] == 0]:
+            if len(self.__packages) <= MAX_LOADED_PACKAGES:
+                break
+            self.__unloadPackage(path)
+
+        self.__idleTimer.start()
+
+    def __unloadPackage(self, packFilePath):
+        package, _, owned = self.__packages.pop(packFilePath)
+
+        # Reference nodes instantiated from that package can't outlive it
+        for group in [g for g, (_, path) in self.__nodes.items() if path == packFilePath]:
+            self.__deleteNode(group)
+
+        if owned:
+            try:
+                self.__getPackageMgr().unloadUserPackage(package)
+            except:
+                pass
+
+    def __unloadIdlePackages(self):
+        for path in [p for p, e in self.__packages.items() if e[1] == 0]:
+            self.__unloadPackage(path)
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Reference nodes, recycled by group. 'create' builds the node in the given graph when not pooled yet
+
+    def getReferenceNode(self, group, packFilePath, create):
+        entry = self.__nodes.get(group)
+        if entry is not None:
+            self.__nodes.move_to_end(group)
+            return entry[0]
+
+        graph = self.getScratchGraph()
+        if graph is None:
+            return None
+
+        node = create(graph)
+        if node is None:
+            return None
+
+        self.__nodes[group] = (node, packFilePath)
+        while len(self.__nodes) > MAX_REFERENCE_NODES:
+            self.__deleteNode(next(iter(self.__nodes)))
+
+        return node
+
+    def __deleteNode(self, group):
+        node, _ = self.__nodes.pop(group)
+        try:
+            self.__scratchGraph.deleteNode(node)
+        except:
+            pass
+
+    # ------------------------------------------------------------------------------------------------------------
+    # Everything back as it was, when the plugin is unloaded
+
+    def shutdown(self):
+        self.__idleTimer.stop()
+
+        for group in list(self.__nodes):
+            self.__deleteNode(group)
+
+        for path in list(self.__packages):
+            self.__unloadPackage(path)
+
+        if self.__scratchPackage is not None:
+            try:
+                self.__getPackageMgr().unloadUserPackage(self.__scratchPackage)
+            except:
+                pass
+
+        self.__scratchPackage = None
+        self.__scratchGraph = None
+
+
+# Shared pool for the whole plugin session
+_referencePool = None
+
+def getReferencePool():
+    global _referencePool
+    if _referencePool is None:
+        _referencePool = ReferencePool()
+    return _referencePool
+
+def shutdownReferencePool():
+    global _referencePool
+    if _referencePool is not None:
+        _referencePool.shutdown()
+        _referencePool = None
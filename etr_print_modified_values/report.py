@@ -0,0 +1,329 @@
+# python
+#
+# etr_print_modified_values - Report formatting
+#
+# Everything that turns values into the label/value text we write in Comments: rounding, shorter labels and values,
+# differences and final cleaning. No 'sd' here, so the in-app path and the headless .sbs reader share exactly the
+# same formatting.
+
+
+import math
+
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError: # Headless use without NumPy, arrays are then compared in plain Python
+    np = None
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- DEFINE SOME VARIABLES, DICTIONARIES AND LISTS ---------------------------------------------------------
+#
+
+roundN = 4 # Overall round value for floats. Change this to 3 or 4 for extra accuracy
+
+# Tolerances when comparing floats (and float vectors) of Modified and Reference nodes. Values are compared before
+# any rounding, so these decide what is really 'modified', 'roundN' only decides how it is shown
+absTolerance = 1e-6
+relTolerance = 1e-6
+MAX_DIGITS = 15 # Digits shown at most for a float differing from its Reference by less than 'roundN'
+
+# Dictionary for special cases to give a better/short readability in Labels
+betterLabelDict = {
+    'Rotation' : 'Rot-Turns',
+    'Angle' : 'Rot-Turns',
+    'Output Color' : 'RGBA',
+    'Blending Mode' : 'Blend',
+    'Tiling Mode' : 'Tiling',
+    'Edge Roundness' : 'Edge Round',
+    'Vector Map Displacement' : 'Vector Map Displ',
+    'Vector Map Multiplier' : 'Vector Map Multip',
+    'Mask Map Threshold' : 'Mask Map Thres',
+    'Luminance By Number' : 'Lumi by Number',
+    'Luminance By Scale' : 'Lumi by Scale',
+    'Luminance Random' : 'Lumi Random',
+    'Luminance by Ring Number' : 'Lumi by Ring Number',
+    'Luminance by Pattern Number' : 'Lumi by Patt Number',
+    'Color Parametrization Multiplier' : 'Color Param Multip',
+    'Color Parametrization Mode' : 'Color Param Mode',
+    'Alpha Channel Content' : 'Alpha Chan Cont',
+    'Cropping Area' : 'Crop',
+    'Gradient Orientation' : 'Grad Orient',
+    'Gradient RGBA' : 'Grad RGBA',
+    'Spline Rotation Random' : 'Spline Rot Rand',
+    'Warp Angle Input Multiplier' : 'Warp Ang Inp Multi',
+    'Spline Distortion Random' : 'Spline Distr Rand',
+    'Spline Distortion Frequency' : 'Spline Distr Freq',
+    'Spline Width Random' : 'Spline Width Rand',
+    'Rotation Random' : 'Rot Rand',
+    'Scale Random' : 'Scale Rand',
+    'Transform matrix' : 'Matrix',
+    'Interstice X/Y' : 'Inters X/Y',
+    'Pattern Input Number' : 'Patt Input Numb'
+}
+
+# Dictionary for special cases to give a better/short readability in Values
+betterValueDict = {
+    'true' : 'TRUE',
+    'false' : 'FALSE',
+    'No_Tiling' : 'NO',
+    'Horizontal_Tiling' : 'HORIZ',
+    'Vertical_Tiling' : 'VERT',
+    'Image Input' : 'Img Input'
+}
+
+# Supported Atomic Nodes (better to list Supported than Unsupported bacause user can create custom Labels for some nodes)
+supportAtomic = ['Blend', 'Blur', 'Channels Shuffle', 'Curve', 'Directional Blur', 'Directional Warp',
+'Distance', 'Emboss', 'Gradient (Dynamic)', 'Gradient Map', 'Grayscale Conversion', 'HSL', 'Levels',
+'Normal', 'Sharpen', 'Text', 'Transformation 2D', 'Uniform Color', 'Warp']
+
+# Unsupported Instances. For the moment, Atomic Nodes that really appear as Instances when using 'modifNode.getReferencedResource()'
+unsupportInstances = ['SVG', 'Bitmap', 'FX-Map']
+
+# Nodes acting as Grayscale or Color depending on their input, with the parameters (labels as shown in Designer) that
+# are a single float when Grayscale but 4 floats when Color. None means every 4 floats parameter (ie LEVELS)
+dualNodes = {
+    'Levels' : None,
+    'Transformation 2D' : ('Matte Color',),
+    'Emboss' : ('Highlight Color', 'Shadow Color')
+}
+
+# Atomic nodes whose output has the format of their (first) input, so Grayscale/Color can be followed upstream
+followInputNodes = ['Blend', 'Blur', 'Curve', 'Directional Blur', 'Directional Warp', 'Distance', 'Emboss', 'Levels',
+'Sharpen', 'Transformation 2D', 'Warp']
+
+# Atomic nodes always giving the same format, whatever their input
+fixedDepthNodes = {
+    'Grayscale Conversion' : 'gray',
+    'Gradient Map' : 'color',
+    'HSL' : 'color',
+    'Normal' : 'color'
+}
+
+# Result used for everything we can't compare
+nonSupported = {'Non': 'Supported'}
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Round a float (or anything convertible to float) and give it back as string, the way we show it in Comments
+def roundFloat(value, digits=None):
+    return str(round(float(value), roundN if digits is None else digits))
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Special case for 'Dual Nodes' to keep only the first float of their color parameters when acting as Grayscale.
+# 'propLabel' is the label before betterLabel
+def grayValue(nodeLabel, nodeDepth, propLabel, value):
+    if nodeDepth != 'gray' or not isinstance(value, tuple) or len(value) != 4:
+        return value
+
+    params = dualNodes.get(nodeLabel, ())
+    if params is None or propLabel in params:
+        return value[0]
+    return value
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Special cases to give a better/short readability
+def betterLabel(label):
+    return betterLabelDict.get(label, label)
+
+def betterValue(value):
+    try:
+        return betterValueDict.get(value, value)
+    except TypeError: # Unhashable values (lists) are never shortened
+        return value
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Enumerator names (ie 'Multiply'). Text like any string parameter, but the database can still tell both apart
+class EnumValue(str):
+    __slots__ = ()
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Array parameters (Curve, Gradient Map keys...) decoded as a table of floats: one row per key, the members of each
+# key flattened in a fixed order. Compared against the Reference all at once and summarised instead of printed
+class KeyArray(object):
+    __slots__ = ('keys',)
+
+    def __init__(self, rows):
+        rows = [tuple(float(v) for v in row) for row in rows]
+        if np is not None:
+            width = len(rows[0]) if rows else 0
+            self.keys = np.array(rows, dtype=np.float64).reshape(len(rows), width)
+        else:
+            self.keys = rows
+
+    def __len__(self):
+        return len(self.keys)
+
+    def toList(self):
+        return [list(row) for row in self.keys]
+
+    # Exact equality, ie an array read again from the scanner index. Use changedKeys() to compare with tolerance
+    def __eq__(self, other):
+        return isinstance(other, KeyArray) and self.toList() == other.toList()
+
+    __hash__ = None
+
+    # Indexes of the keys differing from 'referArray', None if the key count itself differs
+    def changedKeys(self, referArray, absTol=None, relTol=None):
+        absTol = absTolerance if absTol is None else absTol
+        relTol = relTolerance if relTol is None else relTol
+
+        if len(self) != len(referArray):
+            return None
+
+        if np is not None:
+            if self.keys.shape != referArray.keys.shape:
+                return None
+            close = np.isclose(self.keys, referArray.keys, rtol=relTol, atol=absTol).all(axis=1)
+            return np.flatnonzero(~close).tolist()
+
+        changed = []
+        for index, (row, referRow) in enumerate(zip(self.keys, referArray.keys)):
+            if len(row) != len(referRow):
+                return None
+            if not all(math.isclose(v, r, rel_tol=relTol, abs_tol=absTol) for v, r in zip(row, referRow)):
+                changed.append(index)
+        return changed
+
+
+# Summary of the changes of a KeyArray, ie '5 keys / changed 2-3,5' (keys counted from 1). None if equal
+def summariseKeyArray(keyArray, referArray=None, absTol=None, relTol=None):
+    if not isinstance(referArray, KeyArray):
+        return '%d keys' % len(keyArray)
+
+    changed = keyArray.changedKeys(referArray, absTol, relTol)
+
+    if changed is None:
+        return '%d keys / default %d' % (len(keyArray), len(referArray))
+    if not changed:
+        return None
+
+    # Group consecutive indexes in ranges
+    ranges = []
+    start = previous = changed[0]
+    for index in changed[1:] + [None]:
+        if index is not None and index == previous + 1:
+            previous = index
+            continue
+        ranges.append('%d' % (start + 1) if start == previous else '%d-%d' % (start + 1, previous + 1))
+        if index is not None:
+            start = previous = index
+
+    return '%d keys / changed %s' % (len(keyArray), ','.join(ranges))
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Format a plain value (as given by the readers) the way we show it in Comments
+def formatNative(value, digits=None):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+
+    if isinstance(value, float):
+        return roundFloat(value, digits)
+
+    if isinstance(value, tuple):
+        if any(isinstance(v, float) for v in value):
+            return tuple(roundFloat(v, digits) for v in value)
+        return ','.join(str(v) for v in value)
+
+    if isinstance(value, KeyArray):
+        return summariseKeyArray(value)
+
+    return value if isinstance(value, str) else str(value)
+
+
+# A value differing from its Reference by less than 'roundN' shows the same text as the default: add digits until
+# both texts differ, so the Comment never shows a default value as modified
+def formatDistinct(value, referValue):
+    text = formatNative(value)
+    digits = roundN
+    while text == formatNative(referValue, digits) and digits < MAX_DIGITS:
+        digits += 1
+        text = formatNative(value, digits)
+    return text
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Compare two plain values, floats and float vectors with tolerance
+def valuesEqual(value, referValue, absTol=None, relTol=None):
+    if isinstance(value, KeyArray):
+        return isinstance(referValue, KeyArray) and value.changedKeys(referValue, absTol, relTol) == []
+
+    if isinstance(value, float) or isinstance(referValue, float):
+        if isinstance(value, (int, float)) and isinstance(referValue, (int, float)) and not isinstance(value, bool):
+            return math.isclose(value, referValue,
+                                rel_tol=relTolerance if relTol is None else relTol,
+                                abs_tol=absTolerance if absTol is None else absTol)
+        return False
+
+    if isinstance(value, tuple) and isinstance(referValue, tuple):
+        return len(value) == len(referValue) and all(
+            valuesEqual(v, r, absTol, relTol) for v, r in zip(value, referValue))
+
+    return value == referValue
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Formatted difference of a single property against the Reference dictionary, None when equal to it
+def getDifference(key, value, referNode_dict, absTol=None, relTol=None):
+
+    # Arrays get a summary of which keys changed, not just their new value
+    if isinstance(value, KeyArray):
+        return summariseKeyArray(value, referNode_dict.get(key), absTol, relTol)
+
+    if key not in referNode_dict:
+        return betterValue(formatNative(value))
+
+    if valuesEqual(value, referNode_dict[key], absTol, relTol):
+        return None
+
+    return betterValue(formatDistinct(value, referNode_dict[key]))
+
+
+# Special results, once all the differences are known
+def finishDifferentValues(different_dict):
+
+    # For when both nodes are identical I prefer to create a Comment to clarify
+    if len(different_dict) == 0:
+        different_dict = {'All by': 'default'}
+
+    # Super-special case for a 'Normal-OUTPUT-Node' to differenciate from a 'Normal-Node' (both share same Nice Label)
+    if 'Mipmaps' in different_dict:
+        different_dict = nonSupported
+
+    return different_dict
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Differences between Modified and Reference dictionaries of plain values. Only what differs gets formatted
+def getDifferentValues(modifNode_dict, referNode_dict, absTol=None, relTol=None):
+    different_dict = OrderedDict()
+
+    for key, value in modifNode_dict.items():
+        difference = getDifference(key, value, referNode_dict, absTol, relTol)
+        if difference is not None:
+            different_dict.update({key: difference})
+
+    return finishDifferentValues(different_dict)
+
+
+# Plain values behind a 'different' dictionary, for tools comparing or storing values rather than showing them
+def getModifiedNatives(different_dict, modifNode_dict):
+    return OrderedDict((key, modifNode_dict[key]) for key in different_dict if key in modifNode_dict)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Clean the resulting list for simpler and better readability, breaking lines and removing some characters
+def formatDifferentValues(different_dict):
+    differ_list = list(different_dict.items()) # Convert Ordered Dictionary to list
+    differ_str = '\n'.join(map(str, differ_list)) # To convert to various lines
+    differ_str = differ_str.replace("(","").replace(")","").replace("'","").replace(", "," ") # Cleaning characters
+    return differ_str
+
+
@@ -0,0 +1,480 @@
+# python
+#
+# etr_print_modified_values - Headless .sbs reader
+#
+# A .sbs package is XML, and non default parameters of every node are explicitly stored in it. This module reads
+# them without Designer (no 'sd' needed), producing the same label/value report the plugin writes into Comments.
+# Used to audit hundreds of packages in CI:
+#
+#   python -m etr_print_modified_values.sbsreader my_package.sbs --library-dir "<Designer>/resources/packages"
+#
+# Packages are read with iterparse and every node is discarded once reported, so memory stays constant per graph.
+#
+# Labels: Instance nodes get the real labels and defaults from their referenced package (when it can be found).
+# Atomic nodes only store parameter identifiers in the .sbs, so we use the tables below (best effort, extend them
+# as needed) and fall back to the identifier itself.
+
+
+import os
+import sys
+import argparse
+import xml.etree.ElementTree as ET
+
+from collections import OrderedDict, namedtuple
+
+from .report import (supportAtomic, unsupportInstances, dualNodes, nonSupported, betterLabel, grayValue,
+                     getDifferentValues, getModifiedNatives, formatDifferentValues, KeyArray, EnumValue)
+
+
+# One record per node, 'different' is the same Ordered Dictionary the plugin writes in the Comment and 'modified' the
+# plain values behind it (unrounded, for tools comparing values rather than showing them). Empty when not supported
+ModifiedNode = namedtuple('ModifiedNode', 'package graph uid definition label position connections different modified')
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- TABLES FOR ATOMIC NODES --------------------------------------------------------------------------------
+#
+
+# Atomic filter identifiers (as stored in .sbs) to the nice labels shown in Designer
+atomicFilterLabels = {
+    'blend' : 'Blend',
+    'blur' : 'Blur',
+    'shuffle' : 'Channels Shuffle',
+    'curve' : 'Curve',
+    'directionalblur' : 'Directional Blur',
+    'directionalwarp' : 'Directional Warp',
+    'distance' : 'Distance',
+    'emboss' : 'Emboss',
+    'dyngradient' : 'Gradient (Dynamic)',
+    'gradient' : 'Gradient Map',
+    'grayscaleconversion' : 'Grayscale Conversion',
+    'hsl' : 'HSL',
+    'levels' : 'Levels',
+    'normal' : 'Normal',
+    'sharpen' : 'Sharpen',
+    'text' : 'Text',
+    'transformation' : 'Transformation 2D',
+    'uniform' : 'Uniform Color',
+    'warp' : 'Warp',
+    'bitmap' : 'Bitmap',
+    'svg' : 'SVG',
+    'fxmaps' : 'FX-Map'
+}
+
+# Parameter identifiers to labels. Base parameters (shared by all nodes) and then the most common atomic ones
+atomicParamLabels = {
+    'outputsize' : 'Output Size',
+    'format' : 'Output Format',
+    'pixelsize' : 'Pixel Size',
+    'pixelratio' : 'Pixel Ratio',
+    'tiling' : 'Tiling Mode',
+    'randomseed' : 'Random Seed',
+    'opacitymult' : 'Opacity',
+    'blendingmode' : 'Blending Mode',
+    'maskrectangle' : 'Cropping Area',
+    'colorblending' : 'Alpha Blending',
+    'intensity' : 'Intensity',
+    'mblurangle' : 'Angle',
+    'warpangle' : 'Warp Angle',
+    'levelinlow' : 'Level In Low',
+    'levelinmid' : 'Level In Mid',
+    'levelinhigh' : 'Level In High',
+    'leveloutlow' : 'Level Out Low',
+    'levelouthigh' : 'Level Out High',
+    'clamp' : 'Clamp',
+    'hue' : 'Hue',
+    'saturation' : 'Saturation',
+    'luminosity' : 'Lightness',
+    'matrix22' : 'Transform matrix',
+    'mattecolor' : 'Matte Color',
+    'offset' : 'Offset',
+    'outputcolor' : 'Output Color',
+    'colorswitch' : 'Color Mode',
+    'lightangle' : 'Light Angle',
+    'highlightcolor' : 'Highlight Color',
+    'shadowcolor' : 'Shadow Color',
+    'inversedy' : 'Normal Format',
+    'input2alpha' : 'Alpha Channel Content',
+    'distance' : 'Maximum Distance',
+    'channelsweights' : 'Channels Weights',
+    'gradientrgba' : 'Gradient RGBA'
+}
+
+# Enumerations of atomic parameters, stored as integers in .sbs. Same naming the plugin gets from SDTypeEnum ids
+atomicParamEnums = {
+    'blendingmode' : ['copy', 'add', 'subtract', 'multiply', 'add_sub', 'max', 'min', 'switch', 'divide', 'overlay',
+                      'screen', 'soft_light'],
+    'tiling' : ['no_tiling', 'horizontal_tiling', 'vertical_tiling', 'h_and_v_tiling']
+}
+
+# Output 'comptype' of a node, as stored in .sbs
+COMPTYPE_GRAYSCALE = '2'
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- VALUES ------------------------------------------------------------------------------------------------
+#
+
+# Convert a stored value element (ie <constantValueFloat2 v="0.5 0.25"/>) to the same plain value the plugin reads
+# from a live node (ie (0.5, 0.25)). Formatting happens later, shared with the plugin, and only for what differs
+def parseParamValue(valueElem, paramId=None, enumTable=None):
+    if valueElem is None:
+        return 'UNKNOW'
+
+    tag = valueElem.tag
+    v = valueElem.get('v', '')
+
+    if tag == 'dynamicValue':
+        return 'FUNCTION' # Value driven by a function graph, there is no constant to show
+
+    if tag == 'constantValueBool':
+        return v.strip() in ('1', 'true')
+
+    if tag == 'constantValueString':
+        return v
+
+    if tag.startswith('constantValueFloat'):
+        floats = [float(f) for f in v.split()]
+
+        if len(floats) == 1:
+            return floats[0]
+        return tuple(floats)
+
+    if tag.startswith('constantValueInt'):
+        ints = [int(i) for i in v.split()]
+
+        if len(ints) == 1 and enumTable and paramId in enumTable:
+            enums = enumTable[paramId]
+            if 0 <= ints[0] < len(enums):
+                return EnumValue(enums[ints[0]].title()) # Some results are lower case. Best feedback in Uppercase
+
+        if len(ints) == 1:
+            return ints[0]
+        return tuple(ints)
+
+    return 'UNKNOW'
+
+
+# Get the value element inside <paramValue> or <defaultValue>
+def getValueElem(containerElem):
+    if containerElem is None or len(containerElem) == 0:
+        return None
+    return containerElem[0]
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- REFERENCED PACKAGES (DEFAULTS FOR INSTANCE NODES) -----------------------------------------------------
+#
+
+# For every graph instantiated from another package we read its input parameters once: label, identifier and default
+GraphInputs = namedtuple('GraphInputs', 'label params')
+
+_graphInputsCache = OrderedDict()
+GRAPH_INPUTS_CACHE_SIZE = 256
+
+
+def readGraphInputs(packagePath, graphUrl):
+    key = (packagePath, graphUrl)
+    if key in _graphInputsCache:
+        _graphInputsCache.move_to_end(key)
+        return _graphInputsCache[key]
+
+    graphInputs = None
+    graphName = graphUrl.rsplit('/', 1)[-1]
+
+    try:
+        stack = []
+        for event, elem in ET.iterparse(packagePath, events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                continue
+
+            stack.pop()
+
+            # Skip the heavy parts of other graphs right away
+            if elem.tag in ('compNodes', 'GUIObjects', 'paramsGraphs'):
+                elem.clear()
+
+            elif elem.tag == 'graph':
+                identifier = elem.find('identifier')
+                if identifier is not None and identifier.get('v') == graphName:
+                    labelElem = elem.find('attributes/label')
+                    label = labelElem.get('v') if labelElem is not None and labelElem.get('v') else graphName
+
+                    params = OrderedDict()
+                    for paramInput in elem.iterfind('paraminputs/paraminput'):
+                        paramId = paramInput.find('identifier').get('v')
+                        paramLabelElem = paramInput.find('attributes/label')
+                        paramLabel = paramLabelElem.get('v') if paramLabelElem is not None else paramId
+                        params[paramId] = (paramLabel, getValueElem(paramInput.find('defaultValue')))
+
+                    graphInputs = GraphInputs(label, params)
+                    break
+
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+
+    except (OSError, ET.ParseError):
+        graphInputs = None
+
+    _graphInputsCache[key] = graphInputs
+    while len(_graphInputsCache) > GRAPH_INPUTS_CACHE_SIZE:
+        _graphInputsCache.popitem(last=False)
+
+    return graphInputs
+
+
+# Resolve a dependency file name, as stored in .sbs, to a real path
+def resolveDependencyPath(fileName, packagePath, libraryDirs):
+    if fileName == '?himself':
+        return packagePath
+
+    if fileName.startswith('sbs://'):
+        fileName = fileName[len('sbs://'):]
+        for libraryDir in libraryDirs:
+            candidate = os.path.join(libraryDir, fileName)
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    candidate = os.path.normpath(os.path.join(os.path.dirname(packagePath), fileName))
+    return candidate if os.path.isfile(candidate) else None
+
+
+# Dependency file names of a package, as stored in .sbs, but the package itself. Dependencies come before the
+# graphs, so parsing stops there
+def readDependencies(packagePath):
+    fileNames = []
+    for event, elem in ET.iterparse(packagePath, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'content':
+                break
+            continue
+
+        if elem.tag == 'dependency':
+            fileName = elem.find('filename')
+            if fileName is not None and fileName.get('v') != '?himself':
+                fileNames.append(fileName.get('v'))
+            elem.clear()
+
+    return fileNames
+
+
+# Split 'pkg:///blur_hq_grayscale?dependency=1290776959' in ('blur_hq_grayscale', '1290776959')
+def splitInstancePath(path):
+    path = path.replace('pkg:///', '', 1)
+    graphUrl, _, query = path.partition('?')
+    dependency = None
+    for item in query.split('&'):
+        name, _, value = item.partition('=')
+        if name == 'dependency':
+            dependency = value
+    return graphUrl, dependency
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- NODES -------------------------------------------------------------------------------------------------
+#
+
+def readNodeParams(parametersElem, enumTable, nodeLabel, nodeDepth):
+    node_dict = OrderedDict()
+    if parametersElem is None:
+        return node_dict
+
+    for param in parametersElem.iterfind('parameter'):
+        paramId = param.find('name').get('v')
+        value = parseParamValue(getValueElem(param.find('paramValue')), paramId, enumTable)
+
+        # Special case for 'Dual Nodes' (ie LEVELS) acting as Grayscale
+        node_dict[paramId] = grayValue(nodeLabel, nodeDepth, atomicParamLabels.get(paramId, paramId), value)
+
+    return node_dict
+
+
+# Decode an array parameter in a KeyArray: one row per cell, members sorted by name the same way the plugin sorts
+# struct members by id
+def readParamsArray(paramsArray):
+    rows = []
+
+    for cell in paramsArray.iterfind('paramsArrayCells/paramsArrayCell'):
+        members = sorted(cell.iterfind('parameters/parameter'), key=lambda param: param.find('name').get('v'))
+        row = []
+        for member in members:
+            value = parseParamValue(getValueElem(member.find('paramValue')))
+            row.extend(value if isinstance(value, tuple) else (value,))
+        rows.append(row)
+
+    try:
+        return KeyArray(rows)
+    except (TypeError, ValueError):
+        return 'GRAPH'
+
+
+def readCompNode(compNode, packagePath, graphName, dependencies, libraryDirs):
+    uid = compNode.find('uid').get('v')
+
+    gpos = compNode.find('GUILayout/gpos')
+    position = tuple(float(p) for p in gpos.get('v').split()[:2]) if gpos is not None else None
+
+    connections = tuple(
+        (conn.find('identifier').get('v'),
+         conn.find('connRef').get('v') if conn.find('connRef') is not None else None,
+         conn.find('connRefOutput').get('v') if conn.find('connRefOutput') is not None else None)
+        for conn in compNode.iterfind('connections/connection'))
+
+    comptype = compNode.find('compOutputs/compOutput/comptype')
+    nodeDepth = 'gray' if comptype is not None and comptype.get('v') == COMPTYPE_GRAYSCALE else 'color'
+
+    def record(definition, label, different, modifNode_dict=None):
+        modified = getModifiedNatives(different, modifNode_dict or {})
+        return ModifiedNode(packagePath, graphName, uid, definition, label, position, connections, different, modified)
+
+    implementation = compNode.find('compImplementation')
+    implementation = implementation[0] if implementation is not None and len(implementation) else None
+
+    # ------------------------------------------------------------------------------------------------------------
+    # ATOMIC NODES. No Reference to compare with: what is stored in the .sbs is what differs from default
+    if implementation is not None and implementation.tag == 'compFilter':
+        filterId = implementation.find('filter').get('v')
+        definition = 'sbs::compositing::%s' % filterId
+        nodeLabel = atomicFilterLabels.get(filterId, filterId)
+
+        if nodeLabel not in supportAtomic:
+            return record(definition, nodeLabel, nonSupported)
+
+        stored_dict = readNodeParams(implementation.find('parameters'), atomicParamEnums, nodeLabel,
+                                     nodeDepth if nodeLabel in dualNodes else None)
+
+        # Array parameters (Curve, Gradient Map keys...)
+        for paramsArray in implementation.iterfind('paramsArrays/paramsArray'):
+            stored_dict[paramsArray.find('name').get('v')] = readParamsArray(paramsArray)
+
+        modifNode_dict = OrderedDict(
+            (betterLabel(atomicParamLabels.get(paramId, paramId)), value)
+            for paramId, value in stored_dict.items())
+
+        return record(definition, nodeLabel, getDifferentValues(modifNode_dict, {}), modifNode_dict)
+
+    # ------------------------------------------------------------------------------------------------------------
+    # INSTANCE NODES. Labels and defaults come from the referenced graph, when its package can be found
+    if implementation is not None and implementation.tag == 'compInstance':
+        graphUrl, dependency = splitInstancePath(implementation.find('path').get('v'))
+        dependencyFile = dependencies.get(dependency, '')
+        definition = '%s/%s' % (dependencyFile, graphUrl)
+
+        dependencyPath = resolveDependencyPath(dependencyFile, packagePath, libraryDirs) if dependencyFile else None
+        graphInputs = readGraphInputs(dependencyPath, graphUrl) if dependencyPath else None
+        nodeLabel = graphInputs.label if graphInputs else graphUrl.rsplit('/', 1)[-1]
+
+        if nodeLabel in unsupportInstances:
+            return record(definition, nodeLabel, nonSupported)
+
+        stored_dict = readNodeParams(implementation.find('parameters'), None, nodeLabel, None)
+
+        modifNode_dict = OrderedDict()
+        referNode_dict = OrderedDict()
+
+        for paramId, value in stored_dict.items():
+            paramLabel = atomicParamLabels.get(paramId, paramId)
+
+            if graphInputs and paramId in graphInputs.params:
+                paramLabel, defaultElem = graphInputs.params[paramId]
+                if defaultElem is not None:
+                    referNode_dict[betterLabel(paramLabel)] = parseParamValue(defaultElem)
+
+            modifNode_dict[betterLabel(paramLabel)] = value
+
+        return record(definition, nodeLabel, getDifferentValues(modifNode_dict, referNode_dict), modifNode_dict)
+
+    # Input/Output bridges and anything else
+    return record(None, None, nonSupported)
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- PACKAGES ----------------------------------------------------------------------------------------------
+#
+
+# Yield a ModifiedNode for every comp node of every graph in the package, streaming
+def readPackage(packagePath, libraryDirs=()):
+    packagePath = os.path.abspath(packagePath)
+    dependencies = {}
+    graphName = None
+    stack = []
+
+    for event, elem in ET.iterparse(packagePath, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+        parentTag = parent.tag if parent is not None else None
+
+        if elem.tag == 'dependency' and parentTag == 'dependencies':
+            fileName = elem.find('filename')
+            uid = elem.find('uid')
+            if fileName is not None and uid is not None:
+                dependencies[uid.get('v')] = fileName.get('v')
+
+        elif elem.tag == 'identifier' and parentTag == 'graph':
+            graphName = elem.get('v')
+
+        elif elem.tag == 'compNode' and parentTag == 'compNodes':
+            # Well-formed XML can still miss what we expect (ie a node without uid): report the node, go on
+            try:
+                node = readCompNode(elem, packagePath, graphName, dependencies, libraryDirs)
+            except (AttributeError, IndexError, TypeError, ValueError) as e:
+                print(f'Skipping a malformed node of {packagePath} ({graphName}): {e!r}', file=sys.stderr)
+                node = None
+
+            if node is not None:
+                yield node
+
+            # Done with this node: drop it, so memory doesn't grow with the size of the graph
+            elem.clear()
+            parent.remove(elem)
+
+        elif elem.tag == 'graph':
+            graphName = None
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- COMMAND LINE ------------------------------------------------------------------------------------------
+#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Print modified values of every node in .sbs packages, without Designer')
+    parser.add_argument('packages', nargs='+', help='.sbs files to read')
+    parser.add_argument('--library-dir', action='append', default=[],
+                        help="Folder to resolve 'sbs://' dependencies, ie '<Designer>/resources/packages'. Repeatable")
+    parser.add_argument('--all', action='store_true', help='Also list non supported nodes')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for packagePath in args.packages:
+        # A broken or missing package (or anything else going wrong with it) is reported, the others are still read
+        try:
+            for node in readPackage(packagePath, args.library_dir):
+                if node.different is nonSupported and not args.all:
+                    continue
+                print(f'{os.path.basename(node.package)} | {node.graph} | {node.uid} | {node.label}')
+                print('    ' + formatDifferentValues(node.different).replace('\n', '\n    '))
+        except Exception as e:
+            print(f'Could not read {packagePath}: {e}', file=sys.stderr)
+            failed += 1
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+# python
+#
+# etr_print_modified_values - Library scanner
+#
+# Scans a whole folder tree of .sbs packages with the headless reader, using a process pool over all the cores.
+# An on-disk index keyed by file path, mtime/size and content hash keeps the results, so a re-scan only reparses
+# the packages that really changed. Modified values of Instance nodes also depend on the packages they instantiate
+# (their defaults), so each entry keeps its resolved dependencies with their mtime/size too, and a package is
+# reparsed when any of them changed, moved or now resolves elsewhere:
+#
+#   python -m etr_print_modified_values.scanner "D:/Assets/Substance" --index library_index.json --output nodes.jsonl
+
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .report import nonSupported, formatDifferentValues
+from .refcache import encodeValue, decodeValue
+from .sbsreader import ModifiedNode, readPackage, readDependencies, resolveDependencyPath
+
+
+INDEX_FORMAT_VERSION = 5 # Bump this whenever the stored records change shape, old indexes are then rebuilt
+HASH_BLOCK_SIZE = 1 << 20
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Records as stored in the index (JSON friendly) and back
+
+def nodeToRecord(node):
+    return {
+        'graph': node.graph,
+        'uid': node.uid,
+        'definition': node.definition,
+        'label': node.label,
+        'position': node.position,
+        'connections': node.connections,
+        'different': list(node.different.items()),
+        'modified': [(label, encodeValue(value)) for label, value in node.modified.items()]
+    }
+
+def recordToNode(packagePath, record):
+    # JSON has no tuples: vector values come back as lists, but the report compares and prints them as tuples
+    different = dict(
+        (label, tuple(value) if isinstance(value, list) else value) for label, value in record['different'])
+    modified = dict((label, decodeValue(value)) for label, value in record['modified'])
+
+    return ModifiedNode(packagePath, record['graph'], record['uid'], record['definition'], record['label'],
+                        tuple(record['position']) if record['position'] else None,
+                        tuple(tuple(conn) for conn in record['connections']), different, modified)
+
+
+def getFileHash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Dependencies of a package as stored in the index: [file name as in .sbs, resolved path, mtime_ns, size], path and
+# stats None when not found
+def getDependencyEntries(packagePath, libraryDirs):
+    entries = []
+    for fileName in readDependencies(packagePath):
+        path = resolveDependencyPath(fileName, packagePath, libraryDirs)
+        try:
+            stat = os.stat(path)
+            entries.append([fileName, path, stat.st_mtime_ns, stat.st_size])
+        except (OSError, TypeError):
+            entries.append([fileName, None, None, None])
+    return entries
+
+# True if any dependency of an index entry is not the one it was scanned with. 'stats' memoizes (mtime_ns, size)
+# by path, libraries share most of their dependencies
+def dependenciesChanged(entry, packagePath, libraryDirs, stats):
+    for fileName, path, mtime_ns, size in entry['dependencies']:
+        resolved = resolveDependencyPath(fileName, packagePath, libraryDirs)
+        if resolved != path:
+            return True
+        if path is None:
+            continue
+
+        if path not in stats:
+            try:
+                stat = os.stat(path)
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stats[path] = None
+        if stats[path] != (mtime_ns, size):
+            return True
+
+    return False
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Worker, runs in the process pool. Hashing also happens here so it is spread over all the cores too.
+# Returns None as nodes when the content didn't change (only mtime did, ie after a copy or a checkout)
+def scanPackage(packagePath, knownHash, libraryDirs):
+    stat = os.stat(packagePath)
+    contentHash = getFileHash(packagePath)
+
+    try:
+        dependencies = getDependencyEntries(packagePath, libraryDirs)
+    except Exception:
+        dependencies = [] # Broken package, reported below
+
+    if contentHash == knownHash:
+        return packagePath, stat.st_mtime_ns, stat.st_size, contentHash, dependencies, None
+
+    try:
+        nodes = [nodeToRecord(node) for node in readPackage(packagePath, libraryDirs)]
+    except Exception as e:
+        print(f'Could not read {packagePath}: {e}', file=sys.stderr)
+        nodes = []
+
+    return packagePath, stat.st_mtime_ns, stat.st_size, contentHash, dependencies, nodes
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Fingerprint index
+
+def loadIndex(indexPath):
+    try:
+        with open(indexPath, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(index, dict) or index.get('version') != INDEX_FORMAT_VERSION:
+        return {}
+    return index.get('packages', {})
+
+def saveIndex(indexPath, packages):
+    tmpPath = indexPath + '.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_FORMAT_VERSION, 'packages': packages}, f)
+    os.replace(tmpPath, indexPath) # Atomic, an interrupted scan never leaves a broken index
+
+
+def findPackages(rootDir):
+    for dirPath, dirNames, fileNames in os.walk(rootDir):
+        dirNames.sort()
+        for fileName in sorted(fileNames):
+            if fileName.lower().endswith('.sbs'):
+                yield os.path.abspath(os.path.join(dirPath, fileName))
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Scan a folder tree, reparsing only changed packages. Returns {package path: [ModifiedNode, ...]}
+def scanLibrary(rootDir, indexPath=None, libraryDirs=(), jobs=None):
+    return scanLibraryChanges(rootDir, indexPath, libraryDirs, jobs)[0]
+
+
+# Same, also giving the set of packages really reparsed, as ({package path: [ModifiedNode, ...]}, reparsed), so
+# whatever is kept next to the index (ie valuedb.py) only updates those
+def scanLibraryChanges(rootDir, indexPath=None, libraryDirs=(), jobs=None):
+    packages = loadIndex(indexPath) if indexPath else {}
+    scanned = {}
+    toScan = []
+    reparsed = set()
+    stats = {}
+
+    for packagePath in findPackages(rootDir):
+        stat = os.stat(packagePath)
+        entry = packages.get(packagePath)
+
+        # A dependency changed: reparse, even if the package itself is the same
+        if entry and dependenciesChanged(entry, packagePath, libraryDirs, stats):
+            entry = None
+
+        # Same mtime and size: trust the index without even hashing
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            scanned[packagePath] = entry
+        else:
+            toScan.append((packagePath, entry['hash'] if entry else None))
+
+    if toScan:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(scanPackage, [p for p, _ in toScan], [h for _, h in toScan],
+                                   [tuple(libraryDirs)] * len(toScan), chunksize=max(1, len(toScan) // 256))
+
+            for packagePath, mtime_ns, size, contentHash, dependencies, nodes in results:
+                if nodes is None:
+                    nodes = packages[packagePath]['nodes']
+                else:
+                    reparsed.add(packagePath)
+                scanned[packagePath] = {'mtime_ns': mtime_ns, 'size': size, 'hash': contentHash,
+                                        'dependencies': dependencies, 'nodes': nodes}
+
+    print(f'Scanned {len(scanned)} packages, {len(reparsed)} reparsed', file=sys.stderr)
+
+    # Packages no longer on disk simply drop out of the index
+    if indexPath:
+        saveIndex(indexPath, scanned)
+
+    library = dict((packagePath, [recordToNode(packagePath, record) for record in entry['nodes']])
+                   for packagePath, entry in scanned.items())
+    return library, reparsed
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Command line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan a folder tree of .sbs packages for modified values')
+    parser.add_argument('root', help='Folder to scan recursively')
+    parser.add_argument('--index', help='Index file, so re-scans only reparse changed packages')
+    parser.add_argument('--library-dir', action='append', default=[],
+                        help="Folder to resolve 'sbs://' dependencies, ie '<Designer>/resources/packages'. Repeatable")
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--output', help='Write records as JSON lines here instead of printing the report')
+    args = parser.parse_args(argv)
+
+    library = scanLibrary(args.root, args.index, args.library_dir, args.jobs)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for packagePath in sorted(library):
+            for node in library[packagePath]:
+                if node.different == nonSupported:
+                    continue
+                if out:
+                    record = nodeToRecord(node)
+                    record['package'] = packagePath
+                    out.write(json.dumps(record) + '\n')
+                else:
+                    print(f'{os.path.basename(packagePath)} | {node.graph} | {node.uid} | {node.label}')
+                    print('    ' + formatDifferentValues(node.different).replace('\n', '\n    '))
+    finally:
+        if out:
+            out.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# python
+#
+# etr_print_modified_values - Stage timing instrumentation
+#
+# Switchable timings of every stage of a click (package loading, Reference nodes, property reads, serializer, comment
+# creation...) to find where time goes in real sessions. Off by default, enable it with the environment variable
+# ETR_PMV_TRACE=1 before Designer starts, or with trace.enable() from the Python console.
+#
+#   with trace.span('stage'):       timed block, also kept as event for the Chrome trace
+#   trace.timed('stage', function)  the same function when disabled, a timed wrapper (stats only) when enabled.
+#                                   Meant for per-property calls, bound once per node
+#   trace.hit('cache', isHit)       hit rate of caches
+#
+# Disabled, a span is a shared no-op context manager, so instrumented code costs next to nothing.
+#
+# Export with exportJsonLines(path) (one JSON object per event, stage and cache) or exportChromeTrace(path) (open it
+# in chrome://tracing or https://ui.perfetto.dev).
+
+
+import os
+import json
+import time
+
+from collections import OrderedDict
+
+
+MAX_EVENTS = 100000 # Events kept for the Chrome trace, stats keep counting once reached
+
+enabled = os.environ.get('ETR_PMV_TRACE', '') not in ('', '0')
+
+_stages = OrderedDict() # Stage name: [calls, cumulated seconds, max seconds]
+_hits = OrderedDict() # Cache name: [hits, misses]
+_events = [] # (stage name, start, duration), start relative to _origin
+_origin = time.perf_counter()
+
+
+def enable(flag=True):
+    global enabled
+    enabled = bool(flag)
+
+def disable():
+    enable(False)
+
+def reset():
+    global _origin
+    _stages.clear()
+    _hits.clear()
+    del _events[:]
+    _origin = time.perf_counter()
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Recording
+
+def record(name, start, duration, event=True):
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = [0, 0.0, 0.0]
+
+    stage[0] += 1
+    stage[1] += duration
+    if duration > stage[2]:
+        stage[2] = duration
+
+    if event and len(_events) < MAX_EVENTS:
+        _events.append((name, start - _origin, duration))
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_nullSpan = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    if not enabled:
+        return _nullSpan
+    return _Span(name)
+
+
+def timed(name, function):
+    if not enabled:
+        return function
+
+    def timedFunction(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(name, start, time.perf_counter() - start, event=False)
+
+    return timedFunction
+
+
+def hit(name, isHit):
+    if not enabled:
+        return
+
+    counts = _hits.get(name)
+    if counts is None:
+        counts = _hits[name] = [0, 0]
+    counts[0 if isHit else 1] += 1
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Reading and exporting
+
+def getStages():
+    return OrderedDict((name, {'calls': calls, 'total': total, 'max': maximum, 'mean': total / calls})
+                       for name, (calls, total, maximum) in _stages.items())
+
+def getHitRates():
+    return OrderedDict((name, {'hits': hits, 'misses': misses, 'rate': hits / float(hits + misses)})
+                       for name, (hits, misses) in _hits.items() if hits + misses)
+
+
+def formatSummary():
+    lines = [f'{"stage":<28} {"calls":>8} {"total ms":>10} {"mean ms":>9} {"max ms":>9}']
+    for name, stage in getStages().items():
+        lines.append(f'{name:<28} {stage["calls"]:>8} {stage["total"] * 1e3:>10.2f} '
+                     f'{stage["mean"] * 1e3:>9.3f} {stage["max"] * 1e3:>9.3f}')
+    for name, rate in getHitRates().items():
+        lines.append(f'{name:<28} {rate["hits"]:>8} hits {rate["misses"]:>6} misses {rate["rate"]:>7.1%}')
+    return '\n'.join(lines)
+
+
+def exportJsonLines(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for name, start, duration in _events:
+            f.write(json.dumps({'type': 'span', 'name': name, 'start': start, 'duration': duration}) + '\n')
+        for name, stage in getStages().items():
+            f.write(json.dumps(dict(type='stage', name=name, **stage)) + '\n')
+        for name, rate in getHitRates().items():
+            f.write(json.dumps(dict(type='cache', name=name, **rate)) + '\n')
+
+
+def exportChromeTrace(path):
+    events = [{'name': name, 'cat': 'etr_pmv', 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+               'pid': os.getpid(), 'tid': 1}
+              for name, start, duration in _events]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,197 @@
+# python
+#
+# etr_print_modified_values - Modified values database
+#
+# Keeps the modified values of every node (what Comments show) in a local SQLite database, one row per parameter,
+# so questions about a whole library are answered by a query instead of re-opening packages. Rows come from the
+# same extraction as the Comments: the headless reader (scanner.py) for folders of .sbs files, or
+# modvalues.indexGraph for graphs open in Designer.
+#
+#   python -m etr_print_modified_values.valuedb "D:/Assets/Substance" --db values.sqlite --index library_index.json
+#
+# Then, ie all the Blend nodes multiplying with an Opacity under 0.5:
+#
+#   SELECT a.package, a.graph, a.node FROM modified_values a JOIN modified_values b USING (package, graph, node)
+#   WHERE a.node_label = 'Blend' AND a.label = 'Blend' AND a.value = 'Multiply'
+#     AND b.label = 'Opacity' AND b.value_num < 0.5
+#
+# Values are stored as shown in Comments ('value'), plus 'value_num' for numbers so they can be compared as such.
+# Both 'value_num' and 'value_type' come from the plain values behind the Comment, not from its rounded text.
+
+
+import os
+import sys
+import sqlite3
+import argparse
+
+from itertools import islice
+
+from .report import nonSupported, KeyArray, EnumValue
+
+
+BATCH_SIZE = 5000 # Rows per executemany call
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS modified_values (
+    package TEXT NOT NULL,
+    graph TEXT NOT NULL,
+    node TEXT NOT NULL,
+    definition TEXT,
+    node_label TEXT,
+    label TEXT NOT NULL,
+    value TEXT,
+    value_num REAL,
+    value_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS modified_values_definition ON modified_values (definition);
+CREATE INDEX IF NOT EXISTS modified_values_node_label ON modified_values (node_label);
+CREATE INDEX IF NOT EXISTS modified_values_label ON modified_values (label, value_num);
+CREATE INDEX IF NOT EXISTS modified_values_node ON modified_values (package, graph, node);
+'''
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Rows
+
+# Type of a plain value, as given by the readers (see formatters.py). Formatted text can't tell an int2 '1,1' from a
+# string, nor an enum from a string
+def getValueType(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, tuple):
+        return 'vector'
+    if isinstance(value, KeyArray):
+        return 'keys'
+    if isinstance(value, EnumValue):
+        return 'enum'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    return 'string'
+
+
+# Rows of a node: text from its 'different' dictionary, type and number from the plain values behind it
+# (report.getModifiedNatives)
+def getRows(package, graph, node, definition, nodeLabel, different_dict, modified_dict):
+    if different_dict == nonSupported or different_dict == {'All by': 'default'}:
+        return []
+
+    rows = []
+    for label, value in different_dict.items():
+        native = modified_dict.get(label)
+        valueType = getValueType(native)
+        valueNum = float(native) if valueType in ('int', 'float') else None
+
+        if isinstance(value, tuple):
+            value = ' '.join(value) # As in Comments
+        rows.append((package, graph, node, definition, nodeLabel, label, value, valueNum, valueType))
+
+    return rows
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Database
+
+class ValueDatabase(object):
+
+    def __init__(self, filePath):
+        self.__connection = sqlite3.connect(filePath)
+        self.__connection.executescript(SCHEMA)
+
+    def close(self):
+        self.__connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Replace the rows of whole graphs in a single transaction, 'rows' as given by getRows. Graphs are
+    # (package, graph) pairs, their previous rows are deleted first so re-indexing never duplicates rows
+    def replaceGraphs(self, graphs, rows):
+        with self.__connection:
+            self.__connection.executemany('DELETE FROM modified_values WHERE package = ? AND graph = ?', list(graphs))
+            self.__insert(rows)
+
+    # Same for whole packages, ie packages rescanned by the headless reader
+    def replacePackages(self, packages, rows):
+        with self.__connection:
+            self.__connection.executemany('DELETE FROM modified_values WHERE package = ?',
+                                          [(package,) for package in packages])
+            self.__insert(rows)
+
+    # Rows can be any iterable (ie a generator over a whole library), only one batch is in memory at a time
+    def __insert(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                return
+            self.__connection.executemany('INSERT INTO modified_values VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+    def query(self, sql, params=()):
+        return self.__connection.execute(sql, params).fetchall()
+
+    def __len__(self):
+        return self.query('SELECT COUNT(*) FROM modified_values')[0][0]
+
+
+# ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#
+# ----------- PACKAGES ----------------------------------------------------------------------------------------------
+#
+
+# Rows of the nodes read by the headless reader, as {package path: [ModifiedNode, ...]} (see scanner.scanLibrary)
+def getLibraryRows(library):
+    for packagePath, nodes in library.items():
+        for node in nodes:
+            for row in getRows(packagePath, node.graph, node.uid, node.definition, node.label, node.different,
+                               node.modified):
+                yield row
+
+
+def hasRows(packagePath, nodes):
+    return next(getLibraryRows({packagePath: nodes}), None) is not None
+
+
+def main(argv=None):
+    from .scanner import scanLibraryChanges # Process pools and all, only for the command line
+
+    parser = argparse.ArgumentParser(description='Store the modified values of .sbs packages in SQLite')
+    parser.add_argument('root', help='Folder to scan recursively')
+    parser.add_argument('--db', required=True, help='SQLite database to fill (created if needed)')
+    parser.add_argument('--index', help='Index file, so re-scans only reparse changed packages')
+    parser.add_argument('--library-dir', action='append', default=[],
+                        help="Folder to resolve 'sbs://' dependencies, ie '<Designer>/resources/packages'. Repeatable")
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--query', help='SQL query to run once the database is up to date')
+    args = parser.parse_args(argv)
+
+    library, reparsed = scanLibraryChanges(args.root, args.index, args.library_dir, args.jobs)
+
+    with ValueDatabase(args.db) as db:
+        # Only packages reparsed, or not in the database yet (ie a new database next to an existing index), get new
+        # rows. Packages under this folder no longer on disk drop out, but not the ones of sibling folders
+        # ('Substance' is not under 'Substance_old')
+        root = os.path.join(os.path.abspath(args.root), '')
+        stored = set(package for package, in db.query('SELECT DISTINCT package FROM modified_values')
+                     if package.startswith(root))
+        changed = dict((package, nodes) for package, nodes in library.items()
+                       if package in reparsed or package not in stored and hasRows(package, nodes))
+        gone = [package for package in stored if package not in library]
+
+        db.replacePackages(list(changed) + gone, getLibraryRows(changed))
+        print(f'{len(db)} modified values from {len(library)} packages in {args.db}, {len(changed)} updated',
+              file=sys.stderr)
+
+        if args.query:
+            for row in db.query(args.query):
+                print(' | '.join(str(column) for column in row))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
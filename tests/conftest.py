@@ -0,0 +1,37 @@
+# python
+#
+# etr_print_modified_values - Headless tests
+#
+# The sd-free part of the package (.sbs reader, scanner, graph diff, duplicates, database), run on the small packages
+# of 'data/' without Designer nor the benchmark stand-ins:
+#
+#   python -m pytest tests -q
+
+
+import os
+import sys
+import shutil
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(TESTS_DIR, 'data')
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+
+# A copy of the sample packages, so tests can edit them
+@pytest.fixture
+def library(tmp_path):
+    for fileName in os.listdir(DATA_DIR):
+        shutil.copy(os.path.join(DATA_DIR, fileName), str(tmp_path / fileName))
+    return tmp_path
+
+
+# Nodes of a package by uid, as readNodes(packagePath, libraryDirs=())
+@pytest.fixture
+def readNodes():
+    from etr_print_modified_values.sbsreader import readPackage
+
+    def read(packagePath, libraryDirs=()):
+        return dict((node.uid, node) for node in readPackage(str(packagePath), libraryDirs))
+    return read
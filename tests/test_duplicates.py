@@ -0,0 +1,13 @@
+# python
+#
+# etr_print_modified_values - Duplicate node detection tests
+
+
+from etr_print_modified_values import duplicates
+
+
+def test_duplicates(library):
+    groups = duplicates.findPackageDuplicates(str(library / 'sample.sbs'))['main']
+
+    # Both Blend nodes: same values stored in a different order
+    assert [[node.identifier for node in group] for group in groups] == [['1001', '1002']]
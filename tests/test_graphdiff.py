@@ -0,0 +1,49 @@
+# python
+#
+# etr_print_modified_values - Node by node diff tests
+
+
+from etr_print_modified_values import graphdiff
+
+
+def writeVersion(library, fileName, scale):
+    path = library / fileName
+    path.write_text((library / 'sample.sbs').read_text().replace('<constantValueFloat1 v="6"/>',
+                                                                 '<constantValueFloat1 v="%s"/>' % scale))
+    return str(path)
+
+
+# --------------------------------------------------------------------------------------------------------------------
+
+def test_graph_diff(library):
+    newPath = writeVersion(library, 'sample_v2.sbs', '7')
+
+    graphDiff = graphdiff.diffPackages(str(library / 'sample.sbs'), newPath)['main']
+
+    assert not graphDiff.added and not graphDiff.removed
+    assert [nodeDiff.new.identifier for nodeDiff in graphDiff.changed] == ['1005']
+    assert graphDiff.changed[0].changed == {'Scale': (6.0, 7.0)}
+
+
+# Changes under the Comments precision are still changes, shown with all their digits
+def test_graph_diff_precision():
+    old = graphdiff.NodeRecord('1', 'sbs::compositing::blend', 'Blend', None, {'Opacity': 0.12341, 'Mode': 'Copy'})
+    new = old._replace(values={'Opacity': 0.12344, 'Mode': 'Copy'})
+
+    nodeDiff = graphdiff.diffRecords(old, new)
+    assert nodeDiff.changed == {'Opacity': (0.12341, 0.12344)}
+    assert '0.12341 -> 0.12344' in graphdiff.formatGraphDiff(graphdiff.GraphDiff([], [], [nodeDiff], 0))
+
+    assert graphdiff.diffRecords(old, old._replace(values={'Opacity': 0.12341 + 1e-12, 'Mode': 'Copy'})) is None
+
+
+# Same between two .sbs files: the reader keeps the unrounded values for the diff
+def test_package_diff_precision(library):
+    oldPath = writeVersion(library, 'sample_v1.sbs', '6.00001')
+    newPath = writeVersion(library, 'sample_v2.sbs', '6.00004')
+
+    graphDiff = graphdiff.diffPackages(oldPath, newPath)['main']
+
+    assert [nodeDiff.new.identifier for nodeDiff in graphDiff.changed] == ['1005']
+    assert graphDiff.changed[0].changed == {'Scale': (6.00001, 6.00004)}
+    assert '6.00001 -> 6.00004' in graphdiff.formatGraphDiff(graphDiff)
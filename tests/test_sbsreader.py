@@ -0,0 +1,137 @@
+# python
+#
+# etr_print_modified_values - Headless .sbs reader tests
+
+
+from etr_print_modified_values import sbsreader
+from etr_print_modified_values.formatters import readValue
+from etr_print_modified_values.report import nonSupported, getDifferentValues, formatDifferentValues
+
+
+def test_atomic_node(library, readNodes):
+    node = readNodes(library / 'sample.sbs')['1001']
+
+    assert node.definition == 'sbs::compositing::blend' and node.label == 'Blend'
+    assert node.position == (0.0, 0.0)
+    assert dict(node.different) == {'Opacity': '0.25', 'Blend': 'Multiply'}
+    assert dict(node.modified) == {'Opacity': 0.25, 'Blend': 'Multiply'}
+
+
+def test_grayscale_dual_node(library, readNodes):
+    node = readNodes(library / 'sample.sbs')['1003']
+
+    # Levels acting as Grayscale: the 4 floats of its color parameters collapse to one
+    assert dict(node.different) == {'Level In Low': '0.2'}
+    assert node.connections == (('input1', '1001', '2001'),)
+
+
+def test_array_node(library, readNodes):
+    node = readNodes(library / 'sample.sbs')['1004']
+    assert dict(node.different) == {'curveluminance': '2 keys'}
+
+
+def test_instance_node(library, readNodes):
+    node = readNodes(library / 'sample.sbs')['1005']
+
+    # Labels and defaults from the referenced package: 'Count' is stored but equal to its default
+    assert node.label == 'Bricks Generator'
+    assert dict(node.different) == {'Scale': '6.0'}
+
+
+def test_instance_without_dependency(library, readNodes):
+    (library / 'library.sbs').unlink()
+    node = readNodes(library / 'sample.sbs')['1005']
+
+    assert node.label == 'bricks'
+    assert dict(node.different) == {'scale': '6.0', 'count': '8'}
+
+
+def test_non_supported_node(library, readNodes):
+    assert readNodes(library / 'sample.sbs')['1006'].different == nonSupported
+    assert readNodes(library / 'sample.sbs')['1006'].modified == {}
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Same text as the plugin writes, for the same values read from a live node
+
+class Value(object):
+
+    def __init__(self, className, native, valueType=None):
+        self.className, self.native, self.valueType = className, native, valueType
+
+    def getClassName(self):
+        return self.className
+
+    def get(self):
+        return self.native
+
+    def getType(self):
+        return self.valueType
+
+class Enumerator(object):
+
+    def __init__(self, index, identifier):
+        self.index, self.identifier = index, identifier
+
+    def getId(self):
+        return self.identifier
+
+    def getDefaultValue(self):
+        return Value('SDValueInt', self.index)
+
+class EnumType(object):
+
+    def getId(self):
+        return 'sbs::compositing::blendingmode'
+
+    def getEnumerators(self):
+        return [Enumerator(i, name) for i, name in enumerate(sbsreader.atomicParamEnums['blendingmode'])]
+
+
+def test_same_formatting_as_plugin(library, readNodes):
+    node = readNodes(library / 'sample.sbs')['1001']
+
+    modifNode_dict = {
+        'Opacity': readValue(Value('SDValueFloat', 0.25)),
+        'Blend': readValue(Value('SDValueEnum', 3, EnumType())),
+    }
+    referNode_dict = {'Opacity': 1.0, 'Blend': 'Copy'}
+
+    assert formatDifferentValues(node.different) == formatDifferentValues(getDifferentValues(modifNode_dict,
+                                                                                             referNode_dict))
+
+
+# Differences under the Comments precision show enough digits not to look like the default
+def test_differences_under_precision():
+    different = getDifferentValues({'Opacity': 0.99999, 'Offset': (0.5, 0.50002), 'Scale': 2.5},
+                                   {'Opacity': 1.0, 'Offset': (0.5, 0.5), 'Scale': 2.0})
+
+    assert dict(different) == {'Opacity': '0.99999', 'Offset': ('0.5', '0.50002'), 'Scale': '2.5'}
+
+
+# --------------------------------------------------------------------------------------------------------------------
+
+def test_main_reports_broken_packages(library, capsys):
+    (library / 'broken.sbs').write_text('<package><content>')
+
+    assert sbsreader.main([str(library / 'broken.sbs'), str(library / 'sample.sbs')]) == 1
+
+    out, err = capsys.readouterr()
+    assert 'broken.sbs' in err and 'Bricks Generator' in out
+
+
+# Well-formed XML of an unexpected shape: the node is reported and skipped, the rest of the package still read
+def test_malformed_node(library, readNodes, capsys):
+    from etr_print_modified_values import duplicates, graphdiff
+
+    oddPath = library / 'odd.sbs'
+    oddPath.write_text((library / 'sample.sbs').read_text().replace('<uid v="1002"/>', ''))
+
+    nodes = readNodes(oddPath)
+    assert '1001' in nodes and '1005' in nodes and len(nodes) == 5
+    assert 'malformed node' in capsys.readouterr().err
+
+    assert sbsreader.main([str(oddPath)]) == 0
+    assert duplicates.main([str(oddPath)]) == 0
+    assert graphdiff.main([str(library / 'sample.sbs'), str(oddPath)]) == 0
+    assert 'Blend [1002]' in capsys.readouterr().out # Seen as removed
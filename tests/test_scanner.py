@@ -0,0 +1,32 @@
+# python
+#
+# etr_print_modified_values - Library scanner tests
+
+
+from etr_print_modified_values import scanner
+
+
+def editPackage(path, old, new):
+    text = path.read_text()
+    assert old in text
+    path.write_text(text.replace(old, new))
+
+
+# --------------------------------------------------------------------------------------------------------------------
+
+def test_scan_library(library):
+    indexPath = str(library / 'index.json')
+
+    scanned = scanner.scanLibrary(str(library), indexPath, jobs=1)
+    nodes = dict((node.uid, node) for node in scanned[str(library / 'sample.sbs')])
+    assert dict(nodes['1005'].different) == {'Scale': '6.0'}
+
+    # Index entries come back the same
+    rescanned = scanner.scanLibrary(str(library), indexPath, jobs=1)
+    assert rescanned == scanned
+
+    # A new default in the instantiated package changes what the instance modifies, sample.sbs itself unchanged
+    editPackage(library / 'library.sbs', '<constantValueFloat1 v="4"/>', '<constantValueFloat1 v="6"/>')
+    rescanned = scanner.scanLibrary(str(library), indexPath, jobs=1)
+    nodes = dict((node.uid, node) for node in rescanned[str(library / 'sample.sbs')])
+    assert 'Scale' not in nodes['1005'].different
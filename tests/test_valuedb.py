@@ -0,0 +1,73 @@
+# python
+#
+# etr_print_modified_values - Modified values database tests
+
+
+import os
+
+from etr_print_modified_values import scanner, valuedb
+from etr_print_modified_values.report import KeyArray, EnumValue
+
+
+def test_value_database(library):
+    library = scanner.scanLibrary(str(library), jobs=1)
+    dbPath = os.path.join(os.path.dirname(next(iter(library))), 'values.sqlite')
+
+    with valuedb.ValueDatabase(dbPath) as db:
+        db.replacePackages(list(library), valuedb.getLibraryRows(library))
+        db.replacePackages(list(library), valuedb.getLibraryRows(library)) # Replaced, not duplicated
+
+        rows = db.query('SELECT a.node FROM modified_values a JOIN modified_values b USING (package, graph, node) '
+                        'WHERE a.label = ? AND a.value = ? AND b.label = ? AND b.value_num < ?',
+                        ('Blend', 'Multiply', 'Opacity', 0.5))
+        assert sorted(row[0] for row in rows) == ['1001', '1002']
+        assert db.query('SELECT value_type FROM modified_values WHERE node = ?', ('1004',)) == [('keys',)]
+        assert db.query('SELECT value_type FROM modified_values WHERE node = ? AND label = ?',
+                        ('1001', 'Blend')) == [('enum',)]
+
+
+# Types come from the plain values, the formatted text can't tell them apart
+def test_value_types():
+    assert valuedb.getValueType(KeyArray([[0.0, 1.0], [1.0, 0.0]])) == 'keys'
+    assert valuedb.getValueType((0.5, 1.0)) == 'vector'
+    assert valuedb.getValueType((1, 1)) == 'vector'
+    assert valuedb.getValueType(0.25) == 'float'
+    assert valuedb.getValueType(True) == 'bool'
+    assert valuedb.getValueType('12') == 'string'
+    assert valuedb.getValueType(EnumValue('Multiply')) == 'enum'
+
+    rows = valuedb.getRows('p.sbs', 'main', '1', None, 'Node', {'Size': '1,1', 'Text': '12', 'Opacity': '0.1235'},
+                           {'Size': (1, 1), 'Text': '12', 'Opacity': 0.123456})
+    assert [row[6:] for row in rows] == [('1,1', None, 'vector'), ('12', None, 'string'), ('0.1235', 0.123456, 'float')]
+
+
+# Re-indexing a folder keeps the packages of a sibling folder sharing its name as a prefix
+def test_value_database_folders(library):
+    dbPath = str(library / 'values.sqlite')
+    for folder in ('Substance', 'Substance_old'):
+        (library / folder).mkdir()
+        for fileName in ('sample.sbs', 'library.sbs'):
+            (library / folder / fileName).write_text((library / fileName).read_text())
+        assert valuedb.main([str(library / folder), '--db', dbPath, '--jobs', '1']) == 0
+
+    assert valuedb.main([str(library / 'Substance'), '--db', dbPath, '--jobs', '1']) == 0
+    with valuedb.ValueDatabase(dbPath) as db:
+        packages = [package for package, in db.query('SELECT DISTINCT package FROM modified_values')]
+    assert sorted(os.path.basename(os.path.dirname(package)) for package in packages) == ['Substance', 'Substance_old']
+
+
+# With an index, only packages reparsed (or new to the database) get their rows replaced
+def test_value_database_updates(library, capsys):
+    args = [str(library), '--db', str(library / 'values.sqlite'), '--index', str(library / 'index.json'),
+            '--jobs', '1']
+
+    assert valuedb.main(args) == 0
+    assert '2 packages in' in capsys.readouterr().err and valuedb.main(args) == 0
+    assert '0 updated' in capsys.readouterr().err
+
+    (library / 'sample.sbs').write_text((library / 'sample.sbs').read_text().replace('<constantValueFloat1 v="6"/>',
+                                                                                     '<constantValueFloat1 v="7"/>'))
+    assert valuedb.main(args) == 0
+    assert '1 updated' in capsys.readouterr().err
+    with valuedb.ValueDatabase(str(library / 'values.sqlite')) as db:
+        assert db.query('SELECT value_num FROM modified_values WHERE node = ?', ('1005',)) == [(7.0,)]